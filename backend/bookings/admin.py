@@ -1,16 +1,35 @@
+import json
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
 from .models import (
+    Amenity,
+    ArchivedBooking,
     Booking,
+    GuestSurcharge,
     Image,
     Occasion,
+    OutboxMessage,
     PlaneClass,
+    RateRule,
     ResortPackage,
     Room,
     Table,
+    WaitlistEntry,
+    resolve_item_names,
 )
 
 
+@admin.register(Amenity)
+class AmenityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key')
+    search_fields = ('name', 'key')
+
+
 @admin.register(Image)
 class ImageAdmin(admin.ModelAdmin):
     list_display = ('id', 'title', 'url', 'created_at')
@@ -35,14 +54,14 @@ class TableAdmin(admin.ModelAdmin):
 
 @admin.register(ResortPackage)
 class ResortPackageAdmin(admin.ModelAdmin):
-    list_display = ('title', 'price')
+    list_display = ('title', 'price', 'capacity')
     search_fields = ('title',)
     filter_horizontal = ('images',)
 
 
 @admin.register(PlaneClass)
 class PlaneClassAdmin(admin.ModelAdmin):
-    list_display = ('class_name', 'price')
+    list_display = ('class_name', 'price', 'capacity')
     search_fields = ('class_name',)
     filter_horizontal = ('images',)
 
@@ -54,8 +73,103 @@ class OccasionAdmin(admin.ModelAdmin):
     filter_horizontal = ('images',)
 
 
+# Lives here rather than in ``pagination`` so loading the admin at startup
+# does not import DRF.
+class EstimatedCountPaginator(Paginator):
+    """
+    Django paginator that trusts the PostgreSQL planner's row estimate for large results.
+
+    An exact ``COUNT(*)`` is still used when the estimate is below
+    ``exact_count_below`` or on other databases, so small and filtered lists
+    keep precise page counts.
+    """
+
+    exact_count_below = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        db = getattr(queryset, 'db', None)
+        if db is None or connections[db].vendor != 'postgresql':
+            return super().count
+        sql, params = queryset.query.sql_with_params()
+        with connections[db].cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        if estimate < self.exact_count_below:
+            return super().count
+        return estimate
+
+
+class BookingChangeList(ChangeList):
+    """Resolve the item names of a whole page with one query per item type."""
+
+    def get_results(self, request):
+        super().get_results(request)
+        names = resolve_item_names(self.result_list)
+        for booking in self.result_list:
+            booking.item_name = names.get((booking.item_type, booking.item_id))
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
-    list_display = ('user', 'item_type', 'item_id', 'start_date', 'end_date', 'status')
+    list_display = ('user', 'item_type', 'item', 'start_date', 'end_date', 'status')
+    list_filter = ('item_type', 'status')
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
+    search_help_text = "Exact username or booking id."
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return BookingChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # Exact matches use the username and primary key indexes instead of a table scan.
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        matches = queryset.filter(user__username=term)
+        if term.isdigit():
+            matches = matches | queryset.filter(pk=int(term))
+        return matches, False
+
+    @admin.display(description='Item')
+    def item(self, obj):
+        return getattr(obj, 'item_name', None) or f"{obj.item_type} #{obj.item_id}"
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'item_type', 'item_id', 'start_date', 'end_date', 'status', 'archived_at')
     list_filter = ('item_type', 'status')
     search_fields = ('user__username',)
+
+
+@admin.register(RateRule)
+class RateRuleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'item_type', 'item_id', 'start_date', 'end_date', 'weekdays', 'percent')
+    list_filter = ('item_type',)
+
+
+@admin.register(GuestSurcharge)
+class GuestSurchargeAdmin(admin.ModelAdmin):
+    list_display = ('item_type', 'included_guests', 'amount_per_guest')
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('topic', 'status', 'attempts', 'available_at', 'created_at')
+    list_filter = ('status', 'topic')
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'item_type', 'item_id', 'start_date', 'end_date', 'priority', 'status')
+    list_filter = ('status', 'item_type')
+    list_editable = ('priority',)
+    list_select_related = ('user',)
+    raw_id_fields = ('user', 'booking')
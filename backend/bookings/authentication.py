@@ -0,0 +1,83 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+from .models import TokenRevocation
+
+
+REVOCATION_KEY = 'jwt-revoked-before:{user_id}'
+# ``iat`` has whole-second resolution, too coarse to tell a token minted just
+# before a revocation from one minted just after it.
+ISSUED_AT_CLAIM = 'issued_at'
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+}
+
+
+def cache_is_shared() -> bool:
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+def _marker_timeout() -> int:
+    # Every token older than this has expired anyway.
+    return int(settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds())
+
+
+def revoke_user_tokens(user_id) -> None:
+    """Reject every token issued to ``user_id`` before now."""
+    revoked_before = time.time()
+    TokenRevocation.objects.update_or_create(user_id=user_id, defaults={'revoked_before': revoked_before})
+    if cache_is_shared():
+        cache.set(REVOCATION_KEY.format(user_id=user_id), revoked_before, timeout=_marker_timeout())
+
+
+def revoked_before(user_id) -> float:
+    """
+    When ``user_id``'s tokens were last revoked (0 if never). A per-process
+    cache would miss revocations made by other workers, so without a shared
+    cache every check reads the table.
+    """
+    if not cache_is_shared():
+        return TokenRevocation.objects.filter(user_id=user_id).values_list('revoked_before', flat=True).first() or 0
+    key = REVOCATION_KEY.format(user_id=user_id)
+    value = cache.get(key)
+    if value is None:
+        value = TokenRevocation.objects.filter(user_id=user_id).values_list('revoked_before', flat=True).first() or 0
+        # add(), not set(): a concurrent revoke_user_tokens() must win.
+        cache.add(key, value, timeout=_marker_timeout())
+    return value
+
+
+def check_not_revoked(token) -> None:
+    revoked = revoked_before(token.get(api_settings.USER_ID_CLAIM))
+    # Tokens without the precise claim fall back to ``iat``; a tie in the
+    # same second counts as revoked.
+    if revoked and token.get(ISSUED_AT_CLAIM, token.get('iat', 0)) <= revoked:
+        raise InvalidToken("Token has been revoked.")
+
+
+class HotelWillaTokenUser(TokenUser):
+    @cached_property
+    def email(self) -> str:
+        return self.token.get('email', '')
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticate from the token claims alone, without loading the user row.
+
+    Tokens issued before a user's credentials or staff flag changed are
+    rejected through a revocation marker (see ``revoked_before``).
+    """
+
+    def get_user(self, validated_token):
+        check_not_revoked(validated_token)
+        return super().get_user(validated_token)
@@ -0,0 +1,230 @@
+import asyncio
+import itertools
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AvailabilityEvent:
+    item_type: str
+    item_id: int
+    start_date: str
+    end_date: str
+    status: str
+    id: int = 0
+
+    def to_sse(self) -> str:
+        payload = asdict(self)
+        event_id = payload.pop('id')
+        return f"id: {event_id}\nevent: availability\ndata: {json.dumps(payload)}\n\n"
+
+
+class Subscription:
+    """A single client's view of the event stream, backed by a bounded queue."""
+
+    def __init__(self, backend: 'BaseEventBackend', maxsize: int):
+        self.backend = backend
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+
+    def deliver(self, event: AvailabilityEvent) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            logger.warning("Dropping availability event for a slow subscriber")
+
+    def get(self, timeout: Optional[float] = None) -> Optional[AvailabilityEvent]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.backend.unsubscribe(self)
+
+
+class AsyncSubscription(Subscription):
+    """
+    A subscription read from an event loop. Publishers may run on any thread,
+    so events are handed to the loop instead of being put on the queue directly.
+    """
+
+    def __init__(self, backend: 'BaseEventBackend', maxsize: int):
+        self.backend = backend
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event: AvailabilityEvent) -> None:
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: AvailabilityEvent) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning("Dropping availability event for a slow subscriber")
+
+    async def aget(self, timeout: Optional[float] = None) -> Optional[AvailabilityEvent]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class BaseEventBackend:
+    def publish(self, event: AvailabilityEvent) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, asynchronous: bool = False) -> Subscription:
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        raise NotImplementedError
+
+
+class InMemoryEventBackend(BaseEventBackend):
+    """
+    Fan events out to every subscriber in this process.
+
+    Slow consumers never block publishers: when a subscriber's queue is full
+    the event is dropped for that subscriber only. Events published by other
+    processes (other gunicorn workers, ``run_worker``, cron commands) are not
+    seen; use ``PostgresEventBackend`` whenever there is more than one.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def publish(self, event: AvailabilityEvent) -> None:
+        self._fan_out(event)
+
+    def _fan_out(self, event: AvailabilityEvent) -> None:
+        event = AvailabilityEvent(**{**asdict(event), 'id': next(self._ids)})
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def subscribe(self, asynchronous: bool = False) -> Subscription:
+        subscription_class = AsyncSubscription if asynchronous else Subscription
+        subscription = subscription_class(self, maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+class PostgresEventBackend(InMemoryEventBackend):
+    """
+    Share events between processes through PostgreSQL ``LISTEN``/``NOTIFY``.
+
+    Any process publishes with ``pg_notify`` on its regular connection, so a
+    publish inside a transaction is only delivered if it commits. Processes
+    serving streams run one listener thread on a dedicated connection, started
+    by the first subscriber, which fans notifications out to local queues.
+    """
+
+    channel = 'availability_events'
+    poll_seconds = 1
+
+    def __init__(self, queue_size: int = 100, using: str = 'default'):
+        super().__init__(queue_size)
+        self.using = using
+        # Set while LISTEN is active; events published before that are missed.
+        self.listening = threading.Event()
+        self._stopping = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+
+    def publish(self, event: AvailabilityEvent) -> None:
+        payload = json.dumps({key: value for key, value in asdict(event).items() if key != 'id'})
+        with connections[self.using].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def subscribe(self, asynchronous: bool = False) -> Subscription:
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='availability-listener', daemon=True)
+                self._listener.start()
+        return super().subscribe(asynchronous)
+
+    def close(self) -> None:
+        """Stop the listener thread and close its connection."""
+        self._stopping.set()
+        if self._listener is not None:
+            self._listener.join()
+
+    def _listen(self) -> None:
+        import psycopg2
+
+        params = connections[self.using].get_connection_params()
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**params)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.channel}')
+                self.listening.set()
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], self.poll_seconds) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._fan_out(AvailabilityEvent(**json.loads(conn.notifies.pop(0).payload)))
+            except Exception:
+                logger.exception("Availability listener lost its connection; reconnecting")
+                self.listening.clear()
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+_broker: Optional[BaseEventBackend] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> BaseEventBackend:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend_class = import_string(settings.AVAILABILITY_EVENTS['BACKEND'])
+                _broker = backend_class(queue_size=settings.AVAILABILITY_EVENTS['QUEUE_SIZE'])
+    return _broker
+
+
+def booking_event(booking) -> AvailabilityEvent:
+    return AvailabilityEvent(
+        item_type=booking.item_type,
+        item_id=booking.item_id,
+        start_date=booking.start_date.isoformat(),
+        end_date=booking.end_date.isoformat(),
+        status=booking.status,
+    )
+
+
+def publish(event: AvailabilityEvent) -> None:
+    get_broker().publish(event)
@@ -0,0 +1,64 @@
+import csv
+import json
+from itertools import islice
+
+from .models import resolve_item_names
+
+
+EXPORT_FIELDS = [
+    'id', 'user__username', 'item_type', 'item_id', 'start_date', 'end_date',
+    'guests', 'status', 'notes', 'created_at',
+]
+# Spreadsheet apps evaluate cells starting with these as formulas.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+EXPORT_HEADER = [
+    'id', 'username', 'item_type', 'item_id', 'item_name', 'start_date', 'end_date',
+    'guests', 'status', 'notes', 'created_at',
+]
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line straight back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def iter_chunks(queryset, chunk_size):
+    """Yield rows from a server-side cursor in lists of ``chunk_size``, with item names resolved per chunk."""
+    rows = queryset.values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        names = resolve_item_names(chunk)
+        for row in chunk:
+            row['item_name'] = names.get((row['item_type'], row['item_id']))
+        yield chunk
+
+
+def _export_row(row):
+    return [
+        row['id'], row['user__username'], row['item_type'], row['item_id'], row['item_name'],
+        row['start_date'].isoformat(), row['end_date'].isoformat(), row['guests'],
+        row['status'], row['notes'], row['created_at'].isoformat(),
+    ]
+
+
+def _spreadsheet_safe(value):
+    """Quote user-entered text that a spreadsheet would otherwise run as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def stream_csv(queryset, chunk_size):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for chunk in iter_chunks(queryset, chunk_size):
+        yield ''.join(writer.writerow([_spreadsheet_safe(value) for value in _export_row(row)]) for row in chunk)
+
+
+def stream_ndjson(queryset, chunk_size):
+    for chunk in iter_chunks(queryset, chunk_size):
+        yield ''.join(json.dumps(dict(zip(EXPORT_HEADER, _export_row(row)))) + '\n' for row in chunk)
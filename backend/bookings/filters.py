@@ -0,0 +1,40 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import amenity_key
+
+
+class AmenityFilterBackend(BaseFilterBackend):
+    """
+    Filter by ``?amenities=wifi,minibar``; items must offer every amenity listed.
+
+    Each amenity becomes a join on the indexed through table rather than a
+    substring scan of the ``amenities`` text.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        raw = request.query_params.get('amenities', '')
+        for key in {amenity_key(name) for name in raw.split(',')} - {''}:
+            queryset = queryset.filter(amenity_tags__key=key)
+        return queryset
+
+
+class CatalogFilterBackend(BaseFilterBackend):
+    """
+    Apply the query-parameter filters a viewset declares in ``catalog_filters``.
+
+    ``catalog_filters`` maps a query parameter to an ORM lookup, e.g.
+    ``{'min_price': 'price_per_night__gte'}``. Empty parameters are ignored.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for param, lookup in getattr(view, 'catalog_filters', {}).items():
+            value = request.query_params.get(param, '').strip()
+            if not value:
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: value})
+            except (ValueError, DjangoValidationError):
+                raise ValidationError({param: "Enter a valid value."})
+        return queryset
@@ -0,0 +1,111 @@
+import base64
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.utils.encoding import force_bytes
+from rest_framework.exceptions import Throttled
+
+
+class HashingOverloaded(Throttled):
+    default_detail = "Too many sign-in attempts in progress. Please retry shortly."
+
+
+_reject_when_saturated: ContextVar[bool] = ContextVar('reject_when_saturated', default=False)
+
+
+@contextmanager
+def reject_when_saturated():
+    """Inside the block, a saturated pool raises ``HashingOverloaded`` (a 429) instead of waiting."""
+    token = _reject_when_saturated.set(True)
+    try:
+        yield
+    finally:
+        _reject_when_saturated.reset(token)
+
+
+class HashingPool:
+    """
+    Bound how many password hashes run at once.
+
+    With ``WORKERS`` > 0 the PBKDF2 work runs in a process pool so it never
+    competes with request threads for the GIL; otherwise it runs inline. In
+    both cases at most ``MAX_PENDING`` hashes may be in flight per process.
+    API sign-ins and sign-ups (inside ``reject_when_saturated()``) that cannot
+    get a slot within ``WAIT_SECONDS`` are rejected with a 429 instead of
+    queueing; other callers, such as the admin login or ``changepassword``,
+    wait for a slot.
+    """
+
+    def __init__(self, workers: int, max_pending: int, wait_seconds: float):
+        self.workers = workers
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Forking a threaded web worker can copy held locks into the child.
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                    )
+        return self._executor
+
+    def pbkdf2(self, digest_name: str, password: bytes, salt: bytes, iterations: int) -> bytes:
+        if not _reject_when_saturated.get():
+            self._slots.acquire()
+        elif not self._slots.acquire(timeout=self.wait_seconds):
+            raise HashingOverloaded(wait=1)
+        try:
+            if self.workers:
+                return self._get_executor().submit(
+                    hashlib.pbkdf2_hmac, digest_name, password, salt, iterations,
+                ).result()
+            return hashlib.pbkdf2_hmac(digest_name, password, salt, iterations)
+        finally:
+            self._slots.release()
+
+
+_pool: Optional[HashingPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool() -> HashingPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = settings.PASSWORD_HASHING
+                _pool = HashingPool(config['WORKERS'], config['MAX_PENDING'], config['WAIT_SECONDS'])
+    return _pool
+
+
+class BoundedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Drop-in ``pbkdf2_sha256`` hasher that runs through the bounded hashing pool.
+
+    Existing hashes stay valid because the algorithm name is unchanged; the
+    iteration count comes from ``PASSWORD_HASHING['ITERATIONS']`` when set.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING['ITERATIONS'] or PBKDF2PasswordHasher.iterations
+
+    def encode(self, password, salt, iterations=None):
+        self._check_encode_args(password, salt)
+        iterations = iterations or self.iterations
+        hash = get_hashing_pool().pbkdf2(
+            self.digest().name, force_bytes(password), force_bytes(salt), iterations,
+        )
+        hash = base64.b64encode(hash).decode('ascii').strip()
+        return "%s$%d$%s$%s" % (self.algorithm, iterations, salt, hash)
@@ -0,0 +1,67 @@
+from django.db.models import CharField, Value
+
+from .models import Image
+
+
+IMAGE_FIELDS = ['id', 'title', 'file', 'external_url', 'alt_text']
+
+
+class ImageIdentityMap:
+    """
+    Request-scoped loader that attaches ``images`` to catalog items of any type.
+
+    All through tables are read with a single UNION query, each ``Image`` row is
+    materialized once and shared by every item that references it, and the
+    result is installed as the items' prefetch cache so serializers do not
+    query again.
+    """
+
+    def __init__(self):
+        self._images: dict[int, Image] = {}
+
+    def attach(self, items) -> None:
+        items = [item for item in items if item.pk is not None]
+        ids_by_model: dict[type, set] = {}
+        for item in items:
+            ids_by_model.setdefault(type(item), set()).add(item.pk)
+        if not ids_by_model:
+            return
+
+        parts = []
+        for model, ids in ids_by_model.items():
+            through = model.images.through
+            owner = model._meta.model_name
+            parts.append(
+                through.objects
+                .filter(**{f'{owner}_id__in': ids})
+                .annotate(owner=Value(owner, output_field=CharField()))
+                .values_list('owner', f'{owner}_id', *[f'image__{field}' for field in IMAGE_FIELDS])
+            )
+        rows = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+
+        links: dict[tuple, list[Image]] = {}
+        for owner, owner_id, *values in rows:
+            image = self._images.get(values[0])
+            if image is None:
+                image = Image.from_db(rows.db, IMAGE_FIELDS, values)
+                self._images[image.pk] = image
+            links.setdefault((owner, owner_id), []).append(image)
+
+        for item in items:
+            images = sorted(links.get((item._meta.model_name, item.pk), []), key=lambda image: image.pk)
+            queryset = Image.objects.using(rows.db).filter(pk__in=[image.pk for image in images])
+            queryset._result_cache = images
+            queryset._prefetch_done = True
+            item._prefetched_objects_cache = {
+                **getattr(item, '_prefetched_objects_cache', {}),
+                'images': queryset,
+            }
+
+
+def get_image_map(request) -> ImageIdentityMap:
+    """Return the identity map shared by everything serialized during ``request``."""
+    image_map = getattr(request, '_image_identity_map', None)
+    if image_map is None:
+        image_map = ImageIdentityMap()
+        request._image_identity_map = image_map
+    return image_map
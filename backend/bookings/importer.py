@@ -0,0 +1,180 @@
+import csv
+import json
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.fields import empty
+
+from .models import Amenity, Image, Room, Table, amenity_key
+from .search import index_items
+
+
+class CatalogImportError(Exception):
+    def __init__(self, errors):
+        super().__init__("Catalog import failed validation.")
+        self.errors = errors
+
+
+class ImageIdsField(serializers.Field):
+    """
+    Accept image ids as a list or a comma-separated string ("1,2,3"). A blank
+    value, such as an empty CSV cell, leaves the item's images unchanged; an
+    empty list clears them.
+    """
+
+    def get_value(self, dictionary):
+        value = super().get_value(dictionary)
+        if isinstance(value, str) and not value.strip():
+            return empty
+        return value
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [part for part in data.split(',') if part.strip()]
+        try:
+            return [int(value) for value in data]
+        except (TypeError, ValueError):
+            raise serializers.ValidationError("Enter a list of image ids.")
+
+
+class RoomImportSerializer(serializers.ModelSerializer):
+    image_ids = ImageIdsField(required=False)
+
+    class Meta:
+        model = Room
+        fields = ['room_number', 'room_type', 'price_per_night', 'capacity', 'description', 'amenities', 'image_ids']
+        # Existing room numbers are updated, not rejected.
+        extra_kwargs = {'room_number': {'validators': []}}
+
+
+class TableImportSerializer(serializers.ModelSerializer):
+    image_ids = ImageIdsField(required=False)
+
+    class Meta:
+        model = Table
+        fields = ['name', 'seats', 'price', 'table_type', 'description', 'image_ids']
+        extra_kwargs = {'name': {'validators': []}}
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    model: type
+    serializer_class: type
+    natural_key: str
+
+
+IMPORT_SPECS = {
+    'room': ImportSpec(Room, RoomImportSerializer, 'room_number'),
+    'table': ImportSpec(Table, TableImportSerializer, 'name'),
+}
+
+
+IMPORT_FORMATS = ('csv', 'json', 'ndjson')
+# Raised while reading a malformed file: bad JSON, text that is not UTF-8
+# (UnicodeDecodeError is a ValueError) or broken CSV quoting and field sizes.
+PARSE_ERRORS = (ValueError, csv.Error)
+
+
+def read_rows(stream, fmt: str) -> Iterator[dict]:
+    """Return an iterator of row dicts from a text stream of CSV, NDJSON or a JSON array."""
+    if fmt == 'csv':
+        return csv.DictReader(stream)
+    if fmt == 'ndjson':
+        return (json.loads(line) for line in stream if line.strip())
+    if fmt == 'json':
+        return iter(json.load(stream))
+    raise CatalogImportError({'format': f"Unsupported format '{fmt}'. Use one of {', '.join(IMPORT_FORMATS)}."})
+
+
+def import_catalog(item_type: str, rows: Iterable[dict], batch_size: int = 500) -> dict:
+    """
+    Validate and upsert catalog rows in batches inside a single transaction.
+
+    Rows are matched to existing items on the type's natural key. Any invalid
+    row aborts the whole import with ``CatalogImportError``.
+    """
+    spec = IMPORT_SPECS.get(item_type)
+    if spec is None:
+        raise CatalogImportError({'type': f"Unsupported catalog type '{item_type}'."})
+    rows = iter(rows)
+    totals = {'created': 0, 'updated': 0}
+    with transaction.atomic():
+        offset = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            created, updated = _import_batch(spec, batch, offset)
+            totals['created'] += created
+            totals['updated'] += updated
+            offset += len(batch)
+    return totals
+
+
+def _import_batch(spec: ImportSpec, batch: list[dict], offset: int) -> tuple[int, int]:
+    serializer = spec.serializer_class(data=batch, many=True)
+    if not serializer.is_valid():
+        raise CatalogImportError({
+            f"row {offset + index + 1}": errors for index, errors in enumerate(serializer.errors) if errors
+        })
+    model, key = spec.model, spec.natural_key
+    # A key repeated within one batch would make the upsert touch a row twice;
+    # the last occurrence wins, as it would across batches.
+    rows = list({row[key]: row for row in serializer.validated_data}.values())
+
+    image_ids = {pk for row in rows for pk in row.get('image_ids', [])}
+    missing = image_ids - set(Image.objects.filter(pk__in=image_ids).values_list('pk', flat=True))
+    if missing:
+        raise CatalogImportError({'image_ids': f"Unknown image ids: {sorted(missing)}"})
+
+    keys = [row[key] for row in rows]
+    existing = set(model.objects.filter(**{f'{key}__in': keys}).values_list(key, flat=True))
+
+    instances = [model(**{field: value for field, value in row.items() if field != 'image_ids'}) for row in rows]
+    update_fields = [field for field in serializer.child.Meta.fields if field not in (key, 'image_ids')]
+    if model is Room:
+        # bulk_create skips save(), which normally fills this in.
+        display = dict(Room.ROOM_TYPES)
+        for room in instances:
+            room.room_type_display = display[room.room_type]
+        update_fields.append('room_type_display')
+    model.objects.bulk_create(
+        instances,
+        update_conflicts=True,
+        unique_fields=[key],
+        update_fields=update_fields + ['updated_at'],
+    )
+
+    saved = list(model.objects.filter(**{f'{key}__in': keys}))
+    pk_by_key = {getattr(item, key): item.pk for item in saved}
+    _replace_links(model.images.through, model, 'image', {
+        pk_by_key[row[key]]: row['image_ids'] for row in rows if 'image_ids' in row
+    })
+    if hasattr(model, 'amenity_tags'):
+        amenity_ids = {
+            amenity.key: amenity.pk
+            for amenity in Amenity.from_text(','.join(item.amenities for item in saved))
+        }
+        _replace_links(model.amenity_tags.through, model, 'amenity', {
+            item.pk: {amenity_ids[key] for key in map(amenity_key, item.amenities.split(',')) if key}
+            for item in saved
+        })
+    index_items(saved)
+    created = len(set(keys) - existing)
+    return created, len(keys) - created
+
+
+def _replace_links(through, model, target: str, links: dict) -> None:
+    """Replace the M2M rows for the given owners with one delete and one bulk insert."""
+    if not links:
+        return
+    owner = f'{model._meta.model_name}_id'
+    through.objects.filter(**{f'{owner}__in': list(links)}).delete()
+    through.objects.bulk_create(
+        [through(**{owner: owner_pk, f'{target}_id': target_pk})
+         for owner_pk, target_pks in links.items() for target_pk in target_pks],
+        ignore_conflicts=True,
+    )
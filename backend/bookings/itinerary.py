@@ -0,0 +1,93 @@
+from collections import defaultdict
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .events import booking_event, publish
+from .models import BOOKABLE_MODELS, Booking, OutboxMessage, lock_bookable_items, peak_guests
+
+
+class ItineraryConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the selected dates are no longer available."
+    default_code = 'itinerary_conflict'
+
+
+def book_itinerary(user_id: int, items: list[dict], hold: bool = False) -> list[Booking]:
+    """
+    Book every item of an itinerary, or none of them.
+
+    Catalog items are locked grouped by type and in primary key order, the
+    same order every booking change uses, so concurrent itineraries queue
+    instead of deadlocking. Availability for all items is then checked with
+    a single query (shared items against their capacity), and the bookings
+    and their outbox messages are inserted in bulk.
+    """
+    for index, item in enumerate(items):
+        for earlier, other in enumerate(items[:index]):
+            if (
+                (other['item_type'], other['item_id']) == (item['item_type'], item['item_id'])
+                and item['start_date'] < other['end_date'] and item['end_date'] > other['start_date']
+            ):
+                raise ValidationError({'items': [f"Item {index + 1} overlaps item {earlier + 1}."]})
+
+    ids_by_type: dict[str, set] = {}
+    for item in items:
+        ids_by_type.setdefault(item['item_type'], set()).add(item['item_id'])
+
+    with transaction.atomic():
+        for item_type in sorted(ids_by_type):
+            missing = ids_by_type[item_type] - set(lock_bookable_items(item_type, ids_by_type[item_type]))
+            if missing:
+                raise ValidationError({'items': [f"Unknown {item_type} ids: {sorted(missing)}."]})
+
+        capacities = {}
+        for item_type in sorted(ids_by_type.keys() & set(Booking.CAPACITY_ITEM_TYPES)):
+            rows = BOOKABLE_MODELS[item_type].objects.filter(pk__in=ids_by_type[item_type]).values_list('pk', 'capacity')
+            capacities.update({(item_type, pk): capacity for pk, capacity in rows})
+
+        overlap = Q()
+        for item in items:
+            overlap |= Q(
+                item_type=item['item_type'],
+                item_id=item['item_id'],
+                start_date__lt=item['end_date'],
+                end_date__gt=item['start_date'],
+            )
+        booked = defaultdict(list)
+        for item_type, item_id, start, end, guests in Booking.objects.active().filter(overlap).values_list(
+            'item_type', 'item_id', 'start_date', 'end_date', 'guests',
+        ):
+            booked[(item_type, item_id)].append((start, end, guests))
+
+        conflicts = []
+        for index, item in enumerate(items):
+            key = (item['item_type'], item['item_id'])
+            rows = [row for row in booked[key] if item['start_date'] < row[1] and item['end_date'] > row[0]]
+            if key in capacities:
+                clash = peak_guests(rows, item['start_date'], item['end_date']) + item['guests'] > capacities[key]
+            else:
+                clash = bool(rows)
+            if clash:
+                conflicts.append(f"Item {index + 1} is not available for the selected dates.")
+        if conflicts:
+            raise ItineraryConflict({'detail': ItineraryConflict.default_detail, 'items': conflicts})
+
+        expires_at = timezone.now() + timedelta(minutes=settings.BOOKING_HOLD_MINUTES) if hold else None
+        bookings = Booking.objects.bulk_create([
+            Booking(user_id=user_id, expires_at=expires_at, **item) for item in items
+        ])
+        OutboxMessage.objects.bulk_create([
+            OutboxMessage(topic=OutboxMessage.TOPIC_BOOKING_CREATED, payload={'booking_id': booking.pk})
+            for booking in bookings
+        ])
+        # bulk_create skips the post_save signal that normally broadcasts these.
+        for booking in bookings:
+            transaction.on_commit(partial(publish, booking_event(booking)))
+    return bookings
@@ -0,0 +1,114 @@
+import logging
+from datetime import date, timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Booking, OutboxMessage
+from .waitlist import promote_waitlist
+
+
+logger = logging.getLogger(__name__)
+
+HANDLERS: dict[str, list[Callable[[dict], None]]] = {}
+
+
+def handler(topic: str):
+    """Register a side-effect handler for an outbox topic."""
+
+    def decorator(func):
+        HANDLERS.setdefault(topic, []).append(func)
+        return func
+
+    return decorator
+
+
+@handler(OutboxMessage.TOPIC_BOOKING_CREATED)
+def send_booking_received_email(payload: dict) -> None:
+    booking = Booking.objects.select_related('user').filter(pk=payload['booking_id']).first()
+    if not booking or not booking.user.email:
+        return
+    send_mail(
+        subject="Hotel Willa booking received",
+        message=(
+            f"Hi {booking.user.username},\n\n"
+            f"We received your {booking.get_item_type_display().lower()} booking "
+            f"from {booking.start_date} to {booking.end_date}."
+        ),
+        from_email=None,
+        recipient_list=[booking.user.email],
+    )
+
+
+@handler(OutboxMessage.TOPIC_BOOKING_CANCELLED)
+def promote_waitlisted_guests(payload: dict) -> None:
+    promote_waitlist(
+        payload['item_type'],
+        payload['item_id'],
+        date.fromisoformat(payload['start_date']),
+        date.fromisoformat(payload['end_date']),
+    )
+
+
+def claim_batch(batch_size: int) -> list[OutboxMessage]:
+    """
+    Lease up to ``batch_size`` due messages to this worker.
+
+    Claimed rows are marked processing with ``available_at`` pushed out by the
+    lease, so a crashed worker's messages become claimable again once the lease
+    lapses. On databases that support it the claim uses SKIP LOCKED, letting
+    several workers drain the outbox concurrently without blocking each other.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=settings.OUTBOX['LEASE_SECONDS'])
+    with transaction.atomic():
+        qs = OutboxMessage.objects.filter(
+            status__in=[OutboxMessage.STATUS_PENDING, OutboxMessage.STATUS_PROCESSING],
+            available_at__lte=now,
+        ).order_by('available_at')
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        messages = list(qs[:batch_size])
+        OutboxMessage.objects.filter(pk__in=[m.pk for m in messages]).update(
+            status=OutboxMessage.STATUS_PROCESSING,
+            available_at=now + lease,
+            updated_at=now,
+        )
+    return messages
+
+
+def process_message(message: OutboxMessage) -> bool:
+    try:
+        for func in HANDLERS.get(message.topic, []):
+            func(message.payload)
+    except Exception as exc:
+        logger.exception("Outbox message %s failed", message.pk)
+        _record_failure(message, exc)
+        return False
+    OutboxMessage.objects.filter(pk=message.pk).update(
+        status=OutboxMessage.STATUS_DONE,
+        attempts=message.attempts + 1,
+        last_error='',
+        updated_at=timezone.now(),
+    )
+    return True
+
+
+def _record_failure(message: OutboxMessage, exc: Exception) -> None:
+    attempts = message.attempts + 1
+    now = timezone.now()
+    if attempts >= settings.OUTBOX['MAX_ATTEMPTS']:
+        status, available_at = OutboxMessage.STATUS_FAILED, now
+    else:
+        backoff = settings.OUTBOX['RETRY_BACKOFF_SECONDS'] * 2 ** (attempts - 1)
+        status, available_at = OutboxMessage.STATUS_PENDING, now + timedelta(seconds=backoff)
+    OutboxMessage.objects.filter(pk=message.pk).update(
+        status=status,
+        attempts=attempts,
+        available_at=available_at,
+        last_error=repr(exc),
+        updated_at=now,
+    )
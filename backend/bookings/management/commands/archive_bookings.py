@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from bookings.models import ArchivedBooking, Booking
+
+
+ARCHIVED_FIELDS = [
+    'id', 'user_id', 'item_type', 'item_id', 'start_date', 'end_date', 'guests',
+    'status', 'notes', 'expires_at', 'starts_at', 'ends_at', 'created_at', 'updated_at',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Move bookings that ended more than --days ago into the archive table. "
+        "Each batch commits on its own, so an interrupted run can simply be restarted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.localdate() - timedelta(days=options['days'])
+        archived = 0
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    Booking.objects.filter(end_date__lt=cutoff)
+                    .order_by('pk')
+                    .select_for_update()
+                    .values(*ARCHIVED_FIELDS)[:options['batch_size']]
+                )
+                if not rows:
+                    break
+                ArchivedBooking.objects.bulk_create(
+                    [ArchivedBooking(**row) for row in rows],
+                    ignore_conflicts=True,
+                )
+                Booking.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+            archived += len(rows)
+            self.stdout.write(f"Archived {archived} bookings...")
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} bookings ending before {cutoff}."))
@@ -0,0 +1,42 @@
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from bookings.events import booking_event, publish
+from bookings.models import Booking, OutboxMessage
+from bookings.waitlist import promotion_message
+
+
+class Command(BaseCommand):
+    help = "Cancel pending bookings whose hold has expired, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cancelled = 0
+        while True:
+            with transaction.atomic():
+                # Locked so a hold being confirmed right now is either
+                # confirmed first or cancelled here, never both.
+                batch = list(
+                    Booking.objects.expired_holds(now)
+                    .select_for_update()
+                    .order_by('pk')
+                    # ``status`` is read by the post_init signal receiver.
+                    .only('pk', 'status', 'item_type', 'item_id', 'start_date', 'end_date')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                cancelled += Booking.objects.filter(pk__in=[booking.pk for booking in batch]).update(
+                    status=Booking.STATUS_CANCELLED, expires_at=None, updated_at=timezone.now(),
+                )
+                # The released nights may fit someone on the waitlist.
+                OutboxMessage.objects.bulk_create([promotion_message(booking) for booking in batch])
+                for booking in batch:
+                    booking.status = Booking.STATUS_CANCELLED
+                    transaction.on_commit(partial(publish, booking_event(booking)))
+        self.stdout.write(self.style.SUCCESS(f"Cancelled {cancelled} expired holds."))
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.importer import (
+    IMPORT_FORMATS,
+    IMPORT_SPECS,
+    PARSE_ERRORS,
+    CatalogImportError,
+    import_catalog,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert catalog items from a CSV, JSON or NDJSON file, matching existing items on their "
+        "natural key. The whole file is imported in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('item_type', choices=sorted(IMPORT_SPECS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=settings.CATALOG_IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        fmt = options['format'] or {'.jsonl': 'ndjson'}.get(path.suffix, path.suffix.lstrip('.'))
+        try:
+            with path.open(encoding='utf-8-sig', newline='') as stream:
+                result = import_catalog(options['item_type'], read_rows(stream, fmt), options['batch_size'])
+        except CatalogImportError as exc:
+            raise CommandError(f"Import aborted, nothing was saved: {exc.errors}")
+        except PARSE_ERRORS as exc:
+            raise CommandError(f"Import aborted, nothing was saved: the file could not be parsed ({exc}).")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {options['item_type']} catalog: {result['created']} created, {result['updated']} updated."
+        ))
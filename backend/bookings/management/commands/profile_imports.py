@@ -0,0 +1,63 @@
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# What a fresh interpreter imports for each target: plain app setup (every
+# manage.py command) or everything a web worker needs to serve its first request.
+TARGETS = {
+    'setup': "import django; django.setup()",
+    'wsgi': (
+        "from config.wsgi import application; "
+        "from django.urls import get_resolver; get_resolver().url_patterns"
+    ),
+}
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile a cold start with `python -X importtime` in a fresh interpreter and report "
+        "the slowest imports and the packages they come from."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), default='wsgi')
+        parser.add_argument('--limit', type=int, default=25, help="Rows per table.")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', TARGETS[options['target']]],
+            capture_output=True, text=True, env=env,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        imports = []
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_RE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                imports.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+        if not imports:
+            raise CommandError("No -X importtime output was produced.")
+
+        total_us = sum(cumulative for _, _, cumulative, depth in imports if depth == 0)
+        by_package = Counter()
+        for name, self_us, _, _ in imports:
+            by_package[name.split('.')[0]] += self_us
+
+        limit = options['limit']
+        self.stdout.write(f"{options['target']}: {len(imports)} modules imported in {total_us / 1000:.1f} ms\n")
+        self.stdout.write("Slowest imports (cumulative ms, self ms, module):")
+        for name, self_us, cumulative_us, depth in sorted(imports, key=lambda row: -row[2])[:limit]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} {self_us / 1000:8.1f}  {'  ' * depth}{name}")
+        self.stdout.write("\nTime by top-level package (ms):")
+        for package, self_us in by_package.most_common(limit):
+            self.stdout.write(f"  {self_us / 1000:8.1f}  {package}")
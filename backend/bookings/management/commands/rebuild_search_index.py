@@ -0,0 +1,27 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from bookings.models import SearchDocument
+from bookings.search import SEARCHABLE, index_items
+
+
+class Command(BaseCommand):
+    help = "Rebuild the catalog search index from scratch, a batch of items at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        SearchDocument.objects.all().delete()
+        batch_size = options['batch_size']
+        indexed = 0
+        for model in SEARCHABLE:
+            instances = model.objects.order_by('pk').iterator(chunk_size=batch_size)
+            while True:
+                batch = list(islice(instances, batch_size))
+                if not batch:
+                    break
+                index_items(batch)
+                indexed += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} catalog items."))
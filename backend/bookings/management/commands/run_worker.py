@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from bookings.jobs import claim_batch, process_message
+
+
+def _process_in_thread(message):
+    try:
+        return process_message(message)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Drain the booking outbox, running side effects outside the request cycle."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain due messages and exit.")
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX['BATCH_SIZE'])
+        parser.add_argument('--workers', type=int, default=settings.OUTBOX['WORKERS'])
+        parser.add_argument('--poll-interval', type=float, default=settings.OUTBOX['POLL_INTERVAL'])
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        processed = failed = 0
+        try:
+            while True:
+                messages = claim_batch(options['batch_size'])
+                if executor:
+                    results = list(executor.map(_process_in_thread, messages))
+                else:
+                    results = [process_message(message) for message in messages]
+                processed += results.count(True)
+                failed += results.count(False)
+                if messages:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} outbox messages ({failed} failed)."))
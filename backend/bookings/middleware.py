@@ -0,0 +1,22 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from .routers import pin_to_primary
+
+
+class PrimaryPinningMiddleware:
+    """After a user's successful write, pin their reads to the primary for ``REPLICA_PIN_SECONDS``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and user is not None
+            and user.is_authenticated
+        ):
+            pin_to_primary(response, user.pk)
+        return response
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'confirmed'])), fields=['item_type', 'item_id', 'start_date', 'end_date'], name='booking_active_idx'),
+        ),
+    ]
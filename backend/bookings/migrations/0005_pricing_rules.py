@@ -0,0 +1,45 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_archivedbooking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GuestSurcharge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('item_type', models.CharField(choices=[('room', 'Room'), ('table', 'Table'), ('resort', 'Resort'), ('plane', 'Plane Class')], max_length=20, unique=True)),
+                ('included_guests', models.PositiveIntegerField(default=2)),
+                ('amount_per_guest', models.DecimalField(decimal_places=2, max_digits=8)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RateRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=120)),
+                ('item_type', models.CharField(choices=[('room', 'Room'), ('table', 'Table'), ('resort', 'Resort'), ('plane', 'Plane Class')], max_length=20)),
+                ('item_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('weekdays', models.CharField(blank=True, max_length=20)),
+                ('percent', models.DecimalField(decimal_places=2, max_digits=6)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item_type', 'item_id'], name='raterule_item_idx')],
+            },
+        ),
+    ]
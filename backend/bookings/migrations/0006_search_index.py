@@ -0,0 +1,102 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:18
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+FTS_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS searchdoc_fts_idx ON bookings_searchdocument "
+    "USING GIN (to_tsvector('english', title || ' ' || body))"
+)
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(FTS_INDEX_SQL)
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS searchdoc_fts_idx")
+
+
+# Frozen copies of bookings.search, so later changes there do not alter
+# what this migration writes.
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+TITLE_WEIGHT = 3
+DOCUMENTS = {
+    'Room': ('room', lambda room: f"Room {room.room_number} {room.room_type_display}",
+             lambda room: f"{room.description} {room.amenities}"),
+    'Table': ('table', lambda table: table.name,
+              lambda table: f"{table.description} {table.seats} seats"),
+    'ResortPackage': ('resort', lambda resort: resort.title,
+                      lambda resort: f"{resort.description} {resort.amenities}"),
+    'PlaneClass': ('plane', lambda plane: f"{plane.class_name} Class",
+                   lambda plane: f"{plane.description} {plane.amenities}"),
+    'Occasion': ('occasion', lambda occasion: occasion.title,
+                 lambda occasion: f"{occasion.description} {occasion.applicable_items}"),
+}
+
+
+def tokenize(text):
+    return [token[:64] for token in TOKEN_RE.findall(text.lower()) if len(token) > 1]
+
+
+def index_catalog(apps, schema_editor):
+    SearchDocument = apps.get_model('bookings', 'SearchDocument')
+    SearchTerm = apps.get_model('bookings', 'SearchTerm')
+    postgres = schema_editor.connection.vendor == 'postgresql'
+    for model_name, (item_type, get_title, get_body) in DOCUMENTS.items():
+        for item in apps.get_model('bookings', model_name).objects.iterator():
+            title, body = get_title(item)[:255], get_body(item).replace(',', ', ')
+            document = SearchDocument.objects.create(item_type=item_type, item_id=item.pk, title=title, body=body)
+            if postgres:
+                continue
+            weights = Counter(tokenize(body))
+            for token in tokenize(title):
+                weights[token] += TITLE_WEIGHT
+            SearchTerm.objects.bulk_create(
+                SearchTerm(document=document, term=term, weight=weight) for term, weight in weights.items()
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_pricing_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_type', models.CharField(max_length=20)),
+                ('item_id', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='bookings.searchdocument')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('item_type', 'item_id'), name='searchdoc_item_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'document'], name='searchterm_term_idx'),
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+        migrations.RunPython(index_catalog, migrations.RunPython.noop),
+    ]
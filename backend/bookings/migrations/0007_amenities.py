@@ -0,0 +1,62 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:19
+
+import re
+
+from django.db import migrations, models
+
+
+def parse_amenities(apps, schema_editor):
+    Amenity = apps.get_model('bookings', 'Amenity')
+    amenities = {}
+    for model_name in ('Room', 'ResortPackage', 'PlaneClass'):
+        model = apps.get_model('bookings', model_name)
+        for item in model.objects.exclude(amenities=''):
+            tags = []
+            for name in item.amenities.split(','):
+                key = re.sub(r'[^a-z0-9]', '', name.lower())
+                if not key:
+                    continue
+                if key not in amenities:
+                    amenities[key], _ = Amenity.objects.get_or_create(key=key, defaults={'name': name.strip()})
+                tags.append(amenities[key])
+            item.amenity_tags.set(tags)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Amenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=64)),
+                ('key', models.CharField(max_length=64, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'amenities',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='planeclass',
+            name='amenity_tags',
+            field=models.ManyToManyField(blank=True, related_name='plane_classes', to='bookings.amenity'),
+        ),
+        migrations.AddField(
+            model_name='resortpackage',
+            name='amenity_tags',
+            field=models.ManyToManyField(blank=True, related_name='resorts', to='bookings.amenity'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='amenity_tags',
+            field=models.ManyToManyField(blank=True, related_name='rooms', to='bookings.amenity'),
+        ),
+        migrations.RunPython(parse_amenities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:28
+
+from django.db import migrations, models
+
+
+def rename_duplicate_names(apps, schema_editor):
+    """
+    Suffix repeated table names (" (2)", " (3)", ...) so the unique
+    constraint can be added. The oldest table keeps the name; bookings refer
+    to tables by id, so nothing else changes.
+    """
+    Table = apps.get_model('bookings', 'Table')
+    taken = set(Table.objects.values_list('name', flat=True))
+    seen = set()
+    for table in Table.objects.order_by('pk'):
+        if table.name not in seen:
+            seen.add(table.name)
+            continue
+        number = 2
+        while True:
+            suffix = f" ({number})"
+            candidate = table.name[:120 - len(suffix)] + suffix
+            if candidate not in taken:
+                break
+            number += 1
+        taken.add(candidate)
+        table.name = candidate
+        table.save(update_fields=['name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_catalog_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_names, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='table',
+            name='name',
+            field=models.CharField(max_length=120, unique=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0011_booking_user_history_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('item_type', models.CharField(choices=[('room', 'Room'), ('table', 'Table'), ('resort', 'Resort'), ('plane', 'Plane Class')], max_length=20)),
+                ('item_id', models.PositiveIntegerField()),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('guests', models.PositiveIntegerField(default=1)),
+                ('priority', models.IntegerField(default=0, help_text='Higher values are promoted first.')),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('promoted', 'Promoted')], default='waiting', max_length=20)),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='bookings.booking')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'waitlist entries',
+                'ordering': ['-priority', 'created_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'waiting')), fields=['item_type', 'item_id', 'start_date', 'end_date'], name='waitlist_waiting_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_table_time_slots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planeclass',
+            name='capacity',
+            field=models.PositiveIntegerField(default=20, help_text='Seats in this class.'),
+        ),
+        migrations.AddField(
+            model_name='resortpackage',
+            name='capacity',
+            field=models.PositiveIntegerField(default=10, help_text='Guests the package can host on any one day.'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('bookings', '0014_catalog_capacity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('revoked_before', models.FloatField(help_text='Unix time; tokens issued at or before it are rejected.')),
+            ],
+        ),
+    ]
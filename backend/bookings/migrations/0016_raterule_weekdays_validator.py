@@ -0,0 +1,19 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:30
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0015_token_revocation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='raterule',
+            name='weekdays',
+            field=models.CharField(blank=True, max_length=20, validators=[django.core.validators.RegexValidator('^\\s*[1-7]\\s*(,\\s*[1-7]\\s*)*$', 'Enter ISO weekday numbers from 1 (Monday) to 7 (Sunday), separated by commas.')]),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0016_raterule_weekdays_validator'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tokenrevocation',
+            name='user',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
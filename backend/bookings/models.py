@@ -1,7 +1,13 @@
+import re
+from collections import Counter
+from datetime import timedelta
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.validators import RegexValidator
+from django.db import models, transaction
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 
 class TimeStampedModel(models.Model):
@@ -21,13 +27,44 @@ class Image(TimeStampedModel):
     def __str__(self) -> str:
         return self.title or self.alt_text or f"Image {self.pk}"
 
-    @property
+    def save(self, *args, **kwargs):
+        self.__dict__.pop('url', None)
+        super().save(*args, **kwargs)
+
+    @cached_property
     def url(self) -> str:
         if self.file and hasattr(self.file, 'url'):
             return self.file.url
         return self.external_url
 
 
+def amenity_key(name: str) -> str:
+    """Normalize an amenity label for lookups: "Mini Bar" and "minibar" share a key."""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+class Amenity(TimeStampedModel):
+    name = models.CharField(max_length=64)
+    key = models.CharField(max_length=64, unique=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'amenities'
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def from_text(cls, text: str):
+        """Return the amenities named in a comma-separated string, creating missing ones."""
+        names = {amenity_key(name): name.strip() for name in text.split(',') if amenity_key(name)}
+        cls.objects.bulk_create(
+            [cls(name=name, key=key) for key, name in names.items()],
+            ignore_conflicts=True,
+        )
+        return cls.objects.filter(key__in=names)
+
+
 class Room(TimeStampedModel):
     SINGLE = 'single'
     DOUBLE = 'double'
@@ -48,8 +85,16 @@ class Room(TimeStampedModel):
     capacity = models.PositiveIntegerField(default=1)
     description = models.TextField()
     amenities = models.TextField(blank=True)
+    amenity_tags = models.ManyToManyField(Amenity, related_name='rooms', blank=True)
     images = models.ManyToManyField(Image, related_name='rooms', blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['room_type', 'price_per_night'], name='room_type_price_idx'),
+            models.Index(fields=['capacity', 'price_per_night'], name='room_capacity_price_idx'),
+            models.Index(fields=['price_per_night'], name='room_price_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.room_type_display:
             self.room_type_display = dict(self.ROOM_TYPES).get(self.room_type, self.room_type.title())
@@ -62,13 +107,19 @@ class Room(TimeStampedModel):
 class Table(TimeStampedModel):
     TABLE_TYPES = [('2', '2 seats'), ('4', '4 seats'), ('8', '8 seats')]
 
-    name = models.CharField(max_length=120)
+    name = models.CharField(max_length=120, unique=True)
     seats = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=8, decimal_places=2)
     table_type = models.CharField(max_length=2, choices=TABLE_TYPES)
     description = models.TextField()
     images = models.ManyToManyField(Image, related_name='tables', blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['table_type', 'price'], name='table_type_price_idx'),
+            models.Index(fields=['seats', 'price'], name='table_seats_price_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.seats} seats)"
 
@@ -78,6 +129,8 @@ class ResortPackage(TimeStampedModel):
     price = models.DecimalField(max_digits=8, decimal_places=2)
     description = models.TextField()
     amenities = models.TextField(blank=True)
+    amenity_tags = models.ManyToManyField(Amenity, related_name='resorts', blank=True)
+    capacity = models.PositiveIntegerField(default=10, help_text="Guests the package can host on any one day.")
     images = models.ManyToManyField(Image, related_name='resorts', blank=True)
 
     def __str__(self):
@@ -98,6 +151,8 @@ class PlaneClass(TimeStampedModel):
     class_name = models.CharField(max_length=32, choices=CLASS_CHOICES)
     price = models.DecimalField(max_digits=8, decimal_places=2)
     amenities = models.TextField(blank=True)
+    amenity_tags = models.ManyToManyField(Amenity, related_name='plane_classes', blank=True)
+    capacity = models.PositiveIntegerField(default=20, help_text="Seats in this class.")
     description = models.TextField(blank=True)
     images = models.ManyToManyField(Image, related_name='plane_classes', blank=True)
 
@@ -115,12 +170,66 @@ class Occasion(TimeStampedModel):
         return self.title
 
 
+def slot_dates(starts_at, ends_at) -> tuple:
+    """The ``[start_date, end_date)`` day range covering a time slot, in the current time zone."""
+    start_date = timezone.localdate(starts_at)
+    end_date = timezone.localdate(ends_at - timedelta(microseconds=1)) + timedelta(days=1)
+    return start_date, end_date
+
+
+def peak_guests(bookings, start_date, end_date) -> int:
+    """Most guests booked on any one day of ``[start_date, end_date)``, from ``(start, end, guests)`` rows."""
+    changes = Counter()
+    for start, end, guests in bookings:
+        if start >= end_date or end <= start_date:
+            continue
+        changes[max(start, start_date)] += guests
+        changes[min(end, end_date)] -= guests
+    peak = current = 0
+    for day in sorted(changes):
+        current += changes[day]
+        peak = max(peak, current)
+    return peak
+
+
+class BookingQuerySet(models.QuerySet):
+    def active(self, now=None):
+        """Bookings that currently hold inventory: confirmed, or pending with an unexpired hold."""
+        now = now or timezone.now()
+        return self.filter(
+            models.Q(status=Booking.STATUS_CONFIRMED)
+            | models.Q(status=Booking.STATUS_PENDING, expires_at__isnull=True)
+            | models.Q(status=Booking.STATUS_PENDING, expires_at__gt=now)
+        )
+
+    def expired_holds(self, now=None):
+        return self.filter(status=Booking.STATUS_PENDING, expires_at__lte=now or timezone.now())
+
+    def summary(self, today=None) -> dict:
+        """Upcoming and past counts and total nights of the active bookings, in one aggregate query."""
+        today = today or timezone.localdate()
+        result = self.active().aggregate(
+            upcoming=models.Count('pk', filter=models.Q(end_date__gt=today)),
+            past=models.Count('pk', filter=models.Q(end_date__lte=today)),
+            nights=models.Sum(
+                models.F('end_date') - models.F('start_date'),
+                output_field=models.DurationField(),
+            ),
+        )
+        result['total_nights'] = result.pop('nights').days if result['nights'] else 0
+        return result
+
+
 class Booking(TimeStampedModel):
     ITEM_ROOM = 'room'
     ITEM_TABLE = 'table'
     ITEM_RESORT = 'resort'
     ITEM_PLANE = 'plane'
 
+    # Items with a ``capacity`` are shared: they stay bookable until the
+    # guests booked on some day reach it.
+    CAPACITY_ITEM_TYPES = (ITEM_RESORT, ITEM_PLANE)
+
     ITEM_CHOICES = [
         (ITEM_ROOM, 'Room'),
         (ITEM_TABLE, 'Table'),
@@ -138,7 +247,12 @@ class Booking(TimeStampedModel):
         (STATUS_CANCELLED, 'Cancelled'),
     ]
 
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='bookings')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='bookings',
+        db_index=False,
+    )
     item_type = models.CharField(max_length=20, choices=ITEM_CHOICES)
     item_id = models.PositiveIntegerField()
     start_date = models.DateField()
@@ -146,34 +260,397 @@ class Booking(TimeStampedModel):
     guests = models.PositiveIntegerField(default=1)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
     notes = models.TextField(blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    # Table reservations may take a time slot instead of whole days; the
+    # dates above are then derived from it.
+    starts_at = models.DateTimeField(null=True, blank=True)
+    ends_at = models.DateTimeField(null=True, blank=True)
+
+    objects = BookingQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['item_type', 'item_id', 'start_date', 'end_date'],
+                condition=models.Q(status__in=['pending', 'confirmed']),
+                name='booking_active_idx',
+            ),
+            # Sub-day overlap checks and slot searches for table reservations.
+            models.Index(
+                fields=['item_id', 'starts_at', 'ends_at'],
+                condition=models.Q(item_type='table', status__in=['pending', 'confirmed']),
+                name='booking_table_slot_idx',
+            ),
+            # Serves a user's history in order; its prefix replaces the plain FK index.
+            models.Index(fields=['user', '-created_at'], name='booking_user_created_idx'),
+            # Back the admin's list filters together with its default ordering.
+            models.Index(fields=['item_type', '-created_at'], name='booking_type_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='booking_status_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.item_type} #{self.item_id}"
 
     def clean(self):
+        if self.starts_at or self.ends_at:
+            if self.item_type != self.ITEM_TABLE:
+                raise ValidationError("Time slots can only be booked for tables.")
+            if not (self.starts_at and self.ends_at and self.starts_at < self.ends_at):
+                raise ValidationError("A time slot needs a start before its end.")
         if self.start_date >= self.end_date:
             raise ValidationError("End date must be after start date")
         self.validate_availability()
 
     def save(self, *args, **kwargs):
-        self.full_clean()
-        return super().save(*args, **kwargs)
+        if self.status != self.STATUS_PENDING:
+            self.expires_at = None
+        if self.starts_at and self.ends_at:
+            self.start_date, self.end_date = slot_dates(self.starts_at, self.ends_at)
+        # Lock the item like every other booking change, and hold the lock
+        # across the availability check and the write.
+        with transaction.atomic():
+            if self.item_type in BOOKABLE_MODELS:
+                lock_bookable_items(self.item_type, [self.item_id])
+            self.full_clean()
+            return super().save(*args, **kwargs)
 
-    def validate_availability(self):
-        overlapping = Booking.objects.filter(
+    @property
+    def is_time_slot(self) -> bool:
+        return self.starts_at is not None
+
+    def validate_availability(self, ranges=None):
+        """Reject the booking if any other active booking overlaps ``ranges`` (default: its own dates or slot)."""
+        if ranges is None and self.is_time_slot:
+            # Other slots only clash if their times overlap; whole-day
+            # bookings of the table clash on the dates the slot touches.
+            overlap = models.Q(starts_at__lt=self.ends_at, ends_at__gt=self.starts_at) | models.Q(
+                starts_at__isnull=True, start_date__lt=self.end_date, end_date__gt=self.start_date,
+            )
+        else:
+            if ranges is None:
+                ranges = [(self.start_date, self.end_date)]
+            elif not ranges:
+                return
+            overlap = models.Q()
+            for start, end in ranges:
+                overlap |= models.Q(start_date__lt=end, end_date__gt=start)
+        overlapping = Booking.objects.active().filter(
             item_type=self.item_type,
             item_id=self.item_id,
-            status__in=[self.STATUS_PENDING, self.STATUS_CONFIRMED],
-        ).exclude(pk=self.pk).filter(
-            start_date__lt=self.end_date,
-            end_date__gt=self.start_date,
-        )
-        if overlapping.exists():
+        ).exclude(pk=self.pk).filter(overlap)
+        if self.item_type in self.CAPACITY_ITEM_TYPES:
+            self.validate_capacity(overlapping, ranges)
+        elif overlapping.exists():
             raise ValidationError("Selected dates are not available for this item.")
 
+    def validate_capacity(self, overlapping, ranges):
+        """
+        Reject the booking if it would take any day of ``ranges`` over the item's capacity.
+
+        The item row is locked so concurrent bookings are counted one at a
+        time. A single SUM over every overlapping booking settles the common
+        case; only when that upper bound exceeds capacity are the rows read
+        to find the true busiest day.
+        """
+        capacity = (
+            BOOKABLE_MODELS[self.item_type].objects.select_for_update()
+            .filter(pk=self.item_id).values_list('capacity', flat=True).first()
+        ) or 0
+        error = ValidationError(f"Only {capacity} guests can be booked for this item on the selected dates.")
+        if self.guests > capacity:
+            raise error
+        booked = overlapping.aggregate(total=models.Sum('guests'))['total'] or 0
+        if booked + self.guests <= capacity:
+            return
+        rows = list(overlapping.values_list('start_date', 'end_date', 'guests'))
+        for start, end in ranges:
+            if peak_guests(rows, start, end) + self.guests > capacity:
+                raise error
+
+    def newly_claimed(self, start_date, end_date) -> list:
+        """The parts of ``[start_date, end_date)`` not already covered by this booking's dates."""
+        ranges = []
+        if start_date < self.start_date:
+            ranges.append((start_date, min(end_date, self.start_date)))
+        if end_date > self.end_date:
+            ranges.append((max(start_date, self.end_date), end_date))
+        return ranges
+
+    def released(self, start_date, end_date) -> list:
+        """The parts of this booking's dates that ``[start_date, end_date)`` no longer covers."""
+        ranges = []
+        if start_date > self.start_date:
+            ranges.append((self.start_date, min(start_date, self.end_date)))
+        if end_date < self.end_date:
+            ranges.append((max(end_date, self.start_date), self.end_date))
+        return ranges
+
     @property
     def total_nights(self):
         return (self.end_date - self.start_date).days
+
+
+BOOKABLE_MODELS = {
+    Booking.ITEM_ROOM: Room,
+    Booking.ITEM_TABLE: Table,
+    Booking.ITEM_RESORT: ResortPackage,
+    Booking.ITEM_PLANE: PlaneClass,
+}
+
+ITEM_NAME_FIELDS = {
+    Booking.ITEM_ROOM: 'room_number',
+    Booking.ITEM_TABLE: 'name',
+    Booking.ITEM_RESORT: 'title',
+    Booking.ITEM_PLANE: 'class_name',
+}
+
+
+def lock_bookable_items(item_type: str, item_ids) -> list:
+    """
+    Row-lock catalog items in primary key order and return the ids found.
+
+    Anything that changes which nights an item is booked for takes these
+    locks first, so concurrent changes to the same item run one at a time
+    and never deadlock each other.
+    """
+    return list(
+        BOOKABLE_MODELS[item_type].objects.select_for_update()
+        .filter(pk__in=item_ids).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def resolve_item_names(bookings) -> dict:
+    """Map ``(item_type, item_id)`` to a display name with one query per item type."""
+    ids_by_type: dict[str, set] = {}
+    for booking in bookings:
+        item_type, item_id = (
+            (booking['item_type'], booking['item_id']) if isinstance(booking, dict)
+            else (booking.item_type, booking.item_id)
+        )
+        ids_by_type.setdefault(item_type, set()).add(item_id)
+    names = {}
+    for item_type, ids in ids_by_type.items():
+        model = BOOKABLE_MODELS.get(item_type)
+        if model is None:
+            continue
+        rows = model.objects.filter(pk__in=ids).values_list('pk', ITEM_NAME_FIELDS[item_type])
+        names.update({(item_type, pk): name for pk, name in rows})
+    return names
+
+
+class RateRule(TimeStampedModel):
+    """
+    Percentage price adjustment for nights matching a season and/or weekdays.
+
+    ``item_id`` left empty applies the rule to every item of ``item_type``.
+    ``end_date`` is exclusive; ``weekdays`` holds comma-separated ISO weekday
+    numbers of the nights affected (e.g. "5,6" for Friday and Saturday nights).
+    """
+
+    name = models.CharField(max_length=120)
+    item_type = models.CharField(max_length=20, choices=Booking.ITEM_CHOICES)
+    item_id = models.PositiveIntegerField(null=True, blank=True)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    weekdays = models.CharField(
+        max_length=20,
+        blank=True,
+        validators=[RegexValidator(
+            r'^\s*[1-7]\s*(,\s*[1-7]\s*)*$',
+            "Enter ISO weekday numbers from 1 (Monday) to 7 (Sunday), separated by commas.",
+        )],
+    )
+    percent = models.DecimalField(max_digits=6, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item_type', 'item_id'], name='raterule_item_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.percent:+}%)"
+
+    @property
+    def weekday_set(self) -> set[int]:
+        return {int(day) for day in self.weekdays.split(',') if day.strip()}
+
+
+class GuestSurcharge(TimeStampedModel):
+    item_type = models.CharField(max_length=20, choices=Booking.ITEM_CHOICES, unique=True)
+    included_guests = models.PositiveIntegerField(default=2)
+    amount_per_guest = models.DecimalField(max_digits=8, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.get_item_type_display()}: {self.amount_per_guest} per extra guest"
+
+
+class SearchDocument(models.Model):
+    """Denormalized searchable text for one catalog item, refreshed on save."""
+
+    item_type = models.CharField(max_length=20)
+    item_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item_type', 'item_id'], name='searchdoc_item_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_type} #{self.item_id}: {self.title}"
+
+
+class SearchTerm(models.Model):
+    """Inverted index posting used when PostgreSQL full-text search is unavailable."""
+
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'document'], name='searchterm_term_idx'),
+        ]
+
+
+class OutboxMessage(TimeStampedModel):
+    TOPIC_BOOKING_CREATED = 'booking.created'
+    TOPIC_BOOKING_CANCELLED = 'booking.cancelled'
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    topic = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['available_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.status})"
+
+    @classmethod
+    def enqueue(cls, topic, **payload):
+        return cls.objects.create(topic=topic, payload=payload)
+
+
+class ArchivedBooking(models.Model):
+    """
+    Bookings that ended long ago, moved out of the hot ``Booking`` table.
+
+    Rows keep their original primary key and timestamps so they serialize
+    exactly like live bookings.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_bookings')
+    item_type = models.CharField(max_length=20, choices=Booking.ITEM_CHOICES)
+    item_id = models.PositiveIntegerField()
+    start_date = models.DateField()
+    end_date = models.DateField()
+    guests = models.PositiveIntegerField(default=1)
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    notes = models.TextField(blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    starts_at = models.DateTimeField(null=True, blank=True)
+    ends_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.user} - {self.item_type} #{self.item_id} (archived)"
+
+    @property
+    def total_nights(self):
+        return (self.end_date - self.start_date).days
+
+
+class WaitlistEntry(TimeStampedModel):
+    """
+    A guest's request for dates that were unavailable when they asked.
+
+    Waiting entries are promoted to bookings, highest ``priority`` first and
+    then oldest first, when a cancellation frees nights they overlap.
+    """
+
+    STATUS_WAITING = 'waiting'
+    STATUS_PROMOTED = 'promoted'
+
+    STATUS_CHOICES = [
+        (STATUS_WAITING, 'Waiting'),
+        (STATUS_PROMOTED, 'Promoted'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='waitlist_entries')
+    item_type = models.CharField(max_length=20, choices=Booking.ITEM_CHOICES)
+    item_id = models.PositiveIntegerField()
+    start_date = models.DateField()
+    end_date = models.DateField()
+    guests = models.PositiveIntegerField(default=1)
+    priority = models.IntegerField(default=0, help_text="Higher values are promoted first.")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_WAITING)
+    booking = models.OneToOneField(
+        Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name='waitlist_entry',
+    )
+
+    class Meta:
+        ordering = ['-priority', 'created_at']
+        verbose_name_plural = 'waitlist entries'
+        indexes = [
+            # Interval index for the matcher: only waiting rows, searched by
+            # item and then by date range.
+            models.Index(
+                fields=['item_type', 'item_id', 'start_date', 'end_date'],
+                condition=models.Q(status='waiting'),
+                name='waitlist_waiting_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} waiting for {self.item_type} #{self.item_id}"
+
+    def clean(self):
+        if self.start_date >= self.end_date:
+            raise ValidationError("End date must be after start date")
+
+
+class TokenRevocation(models.Model):
+    """
+    The instant before which a user's JWTs are rejected. This table is the
+    source of truth; a shared cache may sit in front of it. Rows outlive
+    their user, so tokens of a deleted account stay rejected.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        related_name='+',
+    )
+    revoked_before = models.FloatField(help_text="Unix time; tokens issued at or before it are rejected.")
+
+    def __str__(self):
+        return f"Tokens of user #{self.user_id} revoked before {self.revoked_before}"
@@ -17,3 +17,4 @@ class ArrayFriendlyPagination(PageNumberPagination):
             'previous': self.get_previous_link(),
         })
 
+
@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable
+
+from django.db.models import Q
+
+from .models import Booking, GuestSurcharge, RateRule
+
+
+CENTS = Decimal('0.01')
+
+# Rooms are priced per night; the other catalog prices cover the whole booking
+# and are adjusted by the rules matching its first night.
+PRICED_PER_NIGHT = {Booking.ITEM_ROOM}
+
+
+@dataclass
+class Quote:
+    item_type: str
+    item_id: int
+    start_date: date
+    end_date: date
+    guests: int
+    units: int
+    base_rate: Decimal
+    subtotal: Decimal
+    adjustments: Decimal
+    guest_surcharge: Decimal
+    total: Decimal
+
+
+def count_matching_nights(start: date, end: date, rule: RateRule) -> int:
+    """
+    Count the nights in ``[start, end)`` that ``rule`` applies to.
+
+    Works in constant time per rule: whole weeks are counted arithmetically
+    and only the trailing partial week (at most six nights) is inspected.
+    """
+    lo = max(start, rule.start_date) if rule.start_date else start
+    hi = min(end, rule.end_date) if rule.end_date else end
+    nights = (hi - lo).days
+    if nights <= 0:
+        return 0
+    weekdays = rule.weekday_set
+    if not weekdays:
+        return nights
+    full_weeks, remainder = divmod(nights, 7)
+    first = lo.isoweekday()
+    tail = sum(1 for offset in range(remainder) if (first - 1 + offset) % 7 + 1 in weekdays)
+    return full_weeks * len(weekdays) + tail
+
+
+class QuoteEngine:
+    """
+    Price items of one catalog type for a stay.
+
+    All rate rules and the guest surcharge for the type are loaded once, so
+    quoting a whole result set costs two queries regardless of its size.
+    """
+
+    def __init__(self, item_type: str, start_date: date, end_date: date):
+        self.item_type = item_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.per_night = item_type in PRICED_PER_NIGHT
+        self.priced_until = end_date if self.per_night else start_date + timedelta(days=1)
+
+        rules = RateRule.objects.filter(item_type=item_type).filter(
+            Q(start_date__isnull=True) | Q(start_date__lt=self.priced_until),
+            Q(end_date__isnull=True) | Q(end_date__gt=start_date),
+        )
+        self.rules_by_item: dict = {}
+        for rule in rules:
+            self.rules_by_item.setdefault(rule.item_id, []).append(rule)
+        self.surcharge = GuestSurcharge.objects.filter(item_type=item_type).first()
+
+    def quote(self, item, guests: int = 1) -> Quote:
+        base_rate = Decimal(getattr(item, 'price_per_night', None) or item.price)
+        units = (self.end_date - self.start_date).days if self.per_night else 1
+        subtotal = base_rate * units
+
+        rules = self.rules_by_item.get(None, []) + self.rules_by_item.get(item.pk, [])
+        weighted_percent = sum(
+            (rule.percent * count_matching_nights(self.start_date, self.priced_until, rule) for rule in rules),
+            Decimal(0),
+        )
+        adjustments = base_rate * weighted_percent / 100
+
+        guest_surcharge = Decimal(0)
+        if self.surcharge:
+            extra_guests = max(guests - self.surcharge.included_guests, 0)
+            guest_surcharge = self.surcharge.amount_per_guest * extra_guests * units
+
+        return Quote(
+            item_type=self.item_type,
+            item_id=item.pk,
+            start_date=self.start_date,
+            end_date=self.end_date,
+            guests=guests,
+            units=units,
+            base_rate=base_rate.quantize(CENTS),
+            subtotal=subtotal.quantize(CENTS),
+            adjustments=adjustments.quantize(CENTS),
+            guest_surcharge=guest_surcharge.quantize(CENTS),
+            total=(subtotal + adjustments + guest_surcharge).quantize(CENTS),
+        )
+
+    def quote_many(self, items: Iterable, guests: int = 1) -> list[Quote]:
+        return [self.quote(item, guests) for item in items]
@@ -0,0 +1,27 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class _ExportRenderer(BaseRenderer):
+    """
+    Lets DRF content negotiation accept ``?format=csv|ndjson`` for export actions.
+
+    Successful exports bypass rendering with a ``StreamingHttpResponse``; these
+    renderers only ever serialize error payloads.
+    """
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
+
+
+class CSVRenderer(_ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(_ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
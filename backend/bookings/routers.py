@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import signing
+
+
+REPLICA_ALIAS = 'replica'
+PIN_HEADER = 'X-Primary-Pin'
+PIN_SALT = 'bookings.routers.primary-pin'
+
+_replica_reads: ContextVar[bool] = ContextVar('replica_reads', default=False)
+
+
+def start_replica_reads():
+    """Route ORM reads to the replica until the returned token is passed to ``stop_replica_reads``."""
+    return _replica_reads.set(True)
+
+
+def stop_replica_reads(token) -> None:
+    _replica_reads.reset(token)
+
+
+@contextmanager
+def read_from_replica():
+    """Route ORM reads inside the block to the replica, when one is configured."""
+    token = start_replica_reads()
+    try:
+        yield
+    finally:
+        stop_replica_reads(token)
+
+
+def pin_to_primary(response, user_id) -> None:
+    """
+    Keep ``user_id``'s reads on the primary long enough for their write to
+    replicate. The pin is a signed, timestamped ``X-Primary-Pin`` response
+    header that the client echoes on its next requests, so it holds whichever
+    worker serves them, and works for cross-origin clients that send no cookies.
+    """
+    response[PIN_HEADER] = signing.TimestampSigner(salt=PIN_SALT).sign(str(user_id))
+
+
+def is_pinned_to_primary(request) -> bool:
+    user = request.user
+    pin = request.headers.get(PIN_HEADER)
+    if not (pin and user and user.is_authenticated):
+        return False
+    try:
+        pinned_user = signing.TimestampSigner(salt=PIN_SALT).unsign(pin, max_age=settings.REPLICA_PIN_SECONDS)
+    except signing.BadSignature:
+        # Forged or expired.
+        return False
+    return pinned_user == str(user.pk)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send reads to the ``replica`` alias only inside ``read_from_replica()``.
+
+    Everything else, including all writes, stays on ``default``, so code that
+    has not opted in keeps read-your-writes consistency.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and REPLICA_ALIAS in settings.DATABASES:
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -0,0 +1,135 @@
+import operator
+import re
+from collections import Counter
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Sum
+from django.db.models.expressions import RawSQL
+
+from .models import Occasion, PlaneClass, ResortPackage, Room, SearchDocument, SearchTerm, Table
+
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+TITLE_WEIGHT = 3
+MAX_TERM_LENGTH = 64
+
+# Must match the expression of the searchdoc_fts_idx GIN index exactly so
+# PostgreSQL can answer the match from the index.
+FTS_VECTOR_SQL = "to_tsvector('english', title || ' ' || body)"
+
+SEARCHABLE = {
+    Room: ('room', lambda room: f"Room {room.room_number} {room.room_type_display}",
+           lambda room: f"{room.description} {room.amenities}"),
+    Table: ('table', lambda table: table.name,
+            lambda table: f"{table.description} {table.seats} seats"),
+    ResortPackage: ('resort', lambda resort: resort.title,
+                    lambda resort: f"{resort.description} {resort.amenities}"),
+    PlaneClass: ('plane', lambda plane: f"{plane.class_name} Class",
+                 lambda plane: f"{plane.description} {plane.amenities}"),
+    Occasion: ('occasion', lambda occasion: occasion.title,
+               lambda occasion: f"{occasion.description} {occasion.applicable_items}"),
+}
+
+
+def tokenize(text: str) -> list[str]:
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text.lower()) if len(token) > 1]
+
+
+def uses_postgres_fts() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def _term_weights(title: str, body: str) -> Counter:
+    weights = Counter(tokenize(body))
+    for token in tokenize(title):
+        weights[token] += TITLE_WEIGHT
+    return weights
+
+
+def _document_text(instance) -> tuple[str, str, str]:
+    item_type, get_title, get_body = SEARCHABLE[type(instance)]
+    return item_type, get_title(instance)[:255], get_body(instance).replace(',', ', ')
+
+
+def index_item(instance) -> None:
+    """Refresh the search document (and, off PostgreSQL, its postings) for one catalog item."""
+    item_type, title, body = _document_text(instance)
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.update_or_create(
+            item_type=item_type,
+            item_id=instance.pk,
+            defaults={'title': title, 'body': body},
+        )
+        if uses_postgres_fts():
+            return
+        document.terms.all().delete()
+        SearchTerm.objects.bulk_create(
+            SearchTerm(document=document, term=term, weight=weight)
+            for term, weight in _term_weights(title, body).items()
+        )
+
+
+def index_items(instances) -> None:
+    """Bulk ``index_item`` for saved items of one catalog type, in a fixed number of queries."""
+    documents = []
+    for instance in instances:
+        item_type, title, body = _document_text(instance)
+        documents.append(SearchDocument(item_type=item_type, item_id=instance.pk, title=title, body=body))
+    if not documents:
+        return
+    with transaction.atomic():
+        SearchDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=['item_type', 'item_id'],
+            update_fields=['title', 'body'],
+        )
+        if uses_postgres_fts():
+            return
+        item_type = documents[0].item_type
+        stored = SearchDocument.objects.filter(
+            item_type=item_type,
+            item_id__in=[document.item_id for document in documents],
+        )
+        SearchTerm.objects.filter(document__in=stored).delete()
+        by_item = {document.item_id: document for document in documents}
+        postings = []
+        for pk, item_id in stored.values_list('pk', 'item_id'):
+            source = by_item[item_id]
+            postings.extend(
+                SearchTerm(document_id=pk, term=term, weight=weight)
+                for term, weight in _term_weights(source.title, source.body).items()
+            )
+        SearchTerm.objects.bulk_create(postings)
+
+
+def remove_item(instance) -> None:
+    item_type = SEARCHABLE[type(instance)][0]
+    SearchDocument.objects.filter(item_type=item_type, item_id=instance.pk).delete()
+
+
+def search(query: str):
+    """
+    Return ranked ``SearchDocument`` rows matching any term of ``query``,
+    best first; documents matching more (and title) terms rank higher.
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return SearchDocument.objects.none()
+    if uses_postgres_fts():
+        # OR the terms, as the postings lookup below does.
+        ts_query = reduce(operator.or_, (SearchQuery(term, config='english') for term in sorted(terms)))
+        vector = RawSQL(FTS_VECTOR_SQL, [], output_field=SearchVectorField())
+        return (
+            SearchDocument.objects.annotate(vector=vector)
+            .filter(vector=ts_query)
+            .annotate(rank=SearchRank(F('vector'), ts_query))
+            .order_by('-rank', 'pk')
+        )
+    return (
+        SearchDocument.objects.filter(terms__term__in=terms)
+        .annotate(rank=Sum('terms__weight', output_field=FloatField()))
+        .order_by('-rank', 'pk')
+    )
@@ -1,19 +1,30 @@
+from datetime import timedelta
 from typing import Any, Optional
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import UploadedFile
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
 from .models import (
+    BOOKABLE_MODELS,
     Booking,
     Image,
     Occasion,
+    OutboxMessage,
     PlaneClass,
     ResortPackage,
     Room,
+    SearchDocument,
     Table,
+    WaitlistEntry,
+    resolve_item_names,
+    slot_dates,
 )
+from .slots import is_bookable_slot, slot_length
 
 
 User = get_user_model()
@@ -65,7 +76,16 @@ class BaseWithImagesSerializer(serializers.ModelSerializer):
         abstract = True
 
 
-class RoomSerializer(BaseWithImagesSerializer):
+class AmenitiesMixin(serializers.Serializer):
+    amenity_list = serializers.SlugRelatedField(
+        source='amenity_tags',
+        slug_field='name',
+        many=True,
+        read_only=True,
+    )
+
+
+class RoomSerializer(AmenitiesMixin, BaseWithImagesSerializer):
     class Meta:
         model = Room
         fields = [
@@ -77,6 +97,7 @@ class RoomSerializer(BaseWithImagesSerializer):
             'capacity',
             'description',
             'amenities',
+            'amenity_list',
             'images',
             'image_ids',
             'created_at',
@@ -101,15 +122,17 @@ class TableSerializer(BaseWithImagesSerializer):
         ]
 
 
-class ResortPackageSerializer(BaseWithImagesSerializer):
+class ResortPackageSerializer(AmenitiesMixin, BaseWithImagesSerializer):
     class Meta:
         model = ResortPackage
         fields = [
             'id',
             'title',
             'price',
+            'capacity',
             'description',
             'amenities',
+            'amenity_list',
             'images',
             'image_ids',
             'created_at',
@@ -117,14 +140,16 @@ class ResortPackageSerializer(BaseWithImagesSerializer):
         ]
 
 
-class PlaneClassSerializer(BaseWithImagesSerializer):
+class PlaneClassSerializer(AmenitiesMixin, BaseWithImagesSerializer):
     class Meta:
         model = PlaneClass
         fields = [
             'id',
             'class_name',
             'price',
+            'capacity',
             'amenities',
+            'amenity_list',
             'description',
             'images',
             'image_ids',
@@ -148,11 +173,21 @@ class OccasionSerializer(BaseWithImagesSerializer):
         ]
 
 
+class BookingListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        bookings = list(data.all() if hasattr(data, 'all') else data)
+        self.child.context['item_names'] = resolve_item_names(bookings)
+        return super().to_representation(bookings)
+
+
 class BookingSerializer(serializers.ModelSerializer):
     item_name = serializers.SerializerMethodField()
+    # Checkout flows ask for a hold that lapses unless confirmed in time.
+    hold = serializers.BooleanField(write_only=True, required=False, default=False)
 
     class Meta:
         model = Booking
+        list_serializer_class = BookingListSerializer
         fields = [
             'id',
             'item_type',
@@ -162,35 +197,37 @@ class BookingSerializer(serializers.ModelSerializer):
             'guests',
             'status',
             'notes',
+            'expires_at',
+            'starts_at',
+            'ends_at',
             'created_at',
             'updated_at',
             'item_name',
+            'hold',
         ]
-        read_only_fields = ['status', 'created_at', 'updated_at', 'item_name']
+        read_only_fields = ['status', 'expires_at', 'created_at', 'updated_at', 'item_name']
+        # Table time-slot bookings derive their dates from ``starts_at``/``ends_at``.
+        extra_kwargs = {'start_date': {'required': False}, 'end_date': {'required': False}}
 
     def get_item_name(self, obj):
-        mapping = {
-            Booking.ITEM_ROOM: Room.objects.filter(pk=obj.item_id).first(),
-            Booking.ITEM_TABLE: Table.objects.filter(pk=obj.item_id).first(),
-            Booking.ITEM_RESORT: ResortPackage.objects.filter(pk=obj.item_id).first(),
-            Booking.ITEM_PLANE: PlaneClass.objects.filter(pk=obj.item_id).first(),
-        }
-        item = mapping.get(obj.item_type)
-        return (
-            getattr(item, 'title', None)
-            or getattr(item, 'name', None)
-            or getattr(item, 'class_name', None)
-            or getattr(item, 'room_number', None)
-        )
+        names = self.context.get('item_names')
+        if names is None:
+            names = resolve_item_names([obj])
+        return names.get((obj.item_type, obj.item_id))
 
     def create(self, validated_data):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            validated_data['user'] = request.user
+            validated_data['user_id'] = request.user.id
+            if validated_data.pop('hold', False):
+                validated_data['expires_at'] = timezone.now() + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
         else:
             raise serializers.ValidationError("Authentication required to create a booking.")
         try:
-            return super().create(validated_data)
+            with transaction.atomic():
+                booking = super().create(validated_data)
+                OutboxMessage.enqueue(OutboxMessage.TOPIC_BOOKING_CREATED, booking_id=booking.pk)
+            return booking
         except DjangoValidationError as exc:
             detail = getattr(exc, 'message_dict', None) or exc.messages or ['Unable to create booking.']
             raise serializers.ValidationError(detail)
@@ -198,18 +235,147 @@ class BookingSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         item_type = attrs.get('item_type')
         item_id = attrs.get('item_id')
-        model_map = {
-            Booking.ITEM_ROOM: Room,
-            Booking.ITEM_TABLE: Table,
-            Booking.ITEM_RESORT: ResortPackage,
-            Booking.ITEM_PLANE: PlaneClass,
-        }
-        model = model_map.get(item_type)
+        model = BOOKABLE_MODELS.get(item_type)
         if not model or not model.objects.filter(pk=item_id).exists():
             raise serializers.ValidationError("Selected item is not available.")
+        if attrs.get('starts_at'):
+            attrs.setdefault('ends_at', attrs['starts_at'] + slot_length())
+            if not is_bookable_slot(attrs['starts_at'], attrs['ends_at']):
+                raise serializers.ValidationError("Choose one of the listed table slots.")
+            attrs['start_date'], attrs['end_date'] = slot_dates(attrs['starts_at'], attrs['ends_at'])
+        elif not (attrs.get('start_date') and attrs.get('end_date')):
+            raise serializers.ValidationError("Provide start_date and end_date, or starts_at for a table slot.")
+        return attrs
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WaitlistEntry
+        fields = ['id', 'item_type', 'item_id', 'start_date', 'end_date', 'guests', 'status', 'booking', 'created_at']
+        read_only_fields = ['status', 'booking', 'created_at']
+
+    def validate(self, attrs):
+        if attrs['start_date'] >= attrs['end_date']:
+            raise serializers.ValidationError("End date must be after start date")
+        if attrs['start_date'] < timezone.localdate():
+            raise serializers.ValidationError("Waitlist dates cannot start in the past.")
+        model = BOOKABLE_MODELS.get(attrs['item_type'])
+        if not model or not model.objects.filter(pk=attrs['item_id']).exists():
+            raise serializers.ValidationError("Selected item is not available.")
+        return attrs
+
+    def create(self, validated_data):
+        validated_data['user_id'] = self.context['request'].user.id
+        return super().create(validated_data)
+
+
+class ItineraryItemSerializer(serializers.Serializer):
+    item_type = serializers.ChoiceField(choices=Booking.ITEM_CHOICES)
+    item_id = serializers.IntegerField(min_value=1)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    guests = serializers.IntegerField(required=False, default=1, min_value=1)
+    notes = serializers.CharField(required=False, default='', allow_blank=True)
+
+    def validate(self, attrs):
+        if attrs['start_date'] >= attrs['end_date']:
+            raise serializers.ValidationError("End date must be after start date")
+        return attrs
+
+
+class ItinerarySerializer(serializers.Serializer):
+    items = ItineraryItemSerializer(many=True, allow_empty=False, max_length=settings.ITINERARY_MAX_ITEMS)
+    hold = serializers.BooleanField(required=False, default=False)
+
+
+class TableSlotsRequestSerializer(serializers.Serializer):
+    date = serializers.DateField()
+
+
+class TableSlotSerializer(serializers.Serializer):
+    starts_at = serializers.DateTimeField()
+    ends_at = serializers.DateTimeField()
+
+
+class TableSlotsSerializer(serializers.ModelSerializer):
+    slots = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Table
+        fields = ['id', 'name', 'seats', 'table_type', 'slots']
+
+    def get_slots(self, obj):
+        slots = self.context['open_slots'][obj.pk]
+        return TableSlotSerializer(
+            [{'starts_at': starts_at, 'ends_at': ends_at} for starts_at, ends_at in slots], many=True,
+        ).data
+
+
+class BookingDatesSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['start_date'] >= attrs['end_date']:
+            raise serializers.ValidationError("End date must be after start date")
         return attrs
 
 
+class BookingExportSerializer(serializers.Serializer):
+    def get_fields(self):
+        # ``from`` is a Python keyword, so the fields cannot be class attributes.
+        return {
+            'from': serializers.DateField(required=False),
+            'to': serializers.DateField(required=False),
+        }
+
+
+class QuoteRequestSerializer(serializers.Serializer):
+    item_type = serializers.ChoiceField(choices=Booking.ITEM_CHOICES)
+    item_id = serializers.IntegerField(required=False, min_value=1)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    guests = serializers.IntegerField(required=False, default=1, min_value=1)
+
+    def validate(self, attrs):
+        if attrs['start_date'] >= attrs['end_date']:
+            raise serializers.ValidationError("End date must be after start date")
+        return attrs
+
+
+class QuoteSerializer(serializers.Serializer):
+    item_type = serializers.CharField()
+    item_id = serializers.IntegerField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    guests = serializers.IntegerField()
+    units = serializers.IntegerField()
+    base_rate = serializers.DecimalField(max_digits=12, decimal_places=2)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    adjustments = serializers.DecimalField(max_digits=12, decimal_places=2)
+    guest_surcharge = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    available = serializers.BooleanField(required=False)
+
+
+class BookingSummarySerializer(serializers.Serializer):
+    upcoming = serializers.IntegerField()
+    past = serializers.IntegerField()
+    total_nights = serializers.IntegerField()
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SearchDocument
+        fields = ['item_type', 'item_id', 'title', 'snippet', 'rank']
+
+    def get_snippet(self, obj):
+        return obj.body[:160]
+
+
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
 
@@ -0,0 +1,73 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .events import booking_event, publish
+from .models import Amenity, Booking, PlaneClass, ResortPackage, Room
+from .search import SEARCHABLE, index_item, remove_item
+from .waitlist import enqueue_promotion
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_status(sender, instance, **kwargs):
+    instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=Booking)
+def broadcast_availability_change(sender, instance, created, **kwargs):
+    if created or instance.status != instance._loaded_status:
+        transaction.on_commit(partial(publish, booking_event(instance)))
+    if not created and instance.status == Booking.STATUS_CANCELLED != instance._loaded_status:
+        enqueue_promotion(instance)
+    instance._loaded_status = instance.status
+
+
+TOKEN_SENSITIVE_FIELDS = ('password', 'is_active', 'is_staff')
+
+
+@receiver(post_init, sender=get_user_model())
+def remember_token_claims(sender, instance, **kwargs):
+    instance._token_fields = tuple(getattr(instance, field) for field in TOKEN_SENSITIVE_FIELDS)
+
+
+@receiver(post_save, sender=get_user_model())
+def revoke_stale_tokens(sender, instance, created, **kwargs):
+    current = tuple(getattr(instance, field) for field in TOKEN_SENSITIVE_FIELDS)
+    if not created and current != instance._token_fields:
+        # Imported here so that app startup (and every manage.py command)
+        # does not load simplejwt and DRF.
+        from .authentication import revoke_user_tokens
+
+        revoke_user_tokens(instance.pk)
+    instance._token_fields = current
+
+
+@receiver(post_delete, sender=get_user_model())
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    # Stateless auth never loads the user row, so it cannot notice the deletion.
+    from .authentication import revoke_user_tokens
+
+    revoke_user_tokens(instance.pk)
+
+
+def refresh_search_document(sender, instance, **kwargs):
+    index_item(instance)
+
+
+def drop_search_document(sender, instance, **kwargs):
+    remove_item(instance)
+
+
+for searchable_model in SEARCHABLE:
+    post_save.connect(refresh_search_document, sender=searchable_model)
+    post_delete.connect(drop_search_document, sender=searchable_model)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_save, sender=ResortPackage)
+@receiver(post_save, sender=PlaneClass)
+def sync_amenity_tags(sender, instance, **kwargs):
+    instance.amenity_tags.set(Amenity.from_text(instance.amenities))
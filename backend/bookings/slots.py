@@ -0,0 +1,60 @@
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Booking
+
+
+def slot_length() -> timedelta:
+    return timedelta(minutes=settings.TABLE_SLOTS['MINUTES'])
+
+
+def slot_grid(day: date) -> list[tuple[datetime, datetime]]:
+    """Every bookable ``(starts_at, ends_at)`` slot on ``day``, in the current time zone."""
+    config = settings.TABLE_SLOTS
+    tz = timezone.get_current_timezone()
+    opens = datetime.combine(day, time.fromisoformat(config['OPENS']), tzinfo=tz)
+    closes = datetime.combine(day, time.fromisoformat(config['CLOSES']), tzinfo=tz)
+    step, length = timedelta(minutes=config['STEP_MINUTES']), slot_length()
+    slots = []
+    starts_at = opens
+    while starts_at + length <= closes:
+        slots.append((starts_at, starts_at + length))
+        starts_at += step
+    return slots
+
+
+def is_bookable_slot(starts_at: datetime, ends_at: datetime) -> bool:
+    """Whether the times are a slot of the grid: within opening hours, on a step and of the configured length."""
+    return (starts_at, ends_at) in slot_grid(timezone.localdate(starts_at))
+
+
+def open_slots(tables, day: date) -> dict[int, list[tuple[datetime, datetime]]]:
+    """
+    Map each table's id to its free slots on ``day``.
+
+    The active reservations (slots and whole days) covering ``day`` for all
+    the tables come from one query by item and date; the grid is then
+    matched against them in memory.
+    """
+    tables = list(tables)
+    grid = slot_grid(day)
+    taken: dict[int, list] = {table.pk: [] for table in tables}
+    if grid:
+        reservations = Booking.objects.active().filter(
+            item_type=Booking.ITEM_TABLE,
+            item_id__in=list(taken),
+            start_date__lte=day,
+            end_date__gt=day,
+        ).values_list('item_id', 'starts_at', 'ends_at')
+        for item_id, starts_at, ends_at in reservations:
+            # A whole-day reservation blocks every slot of the day.
+            taken[item_id].append((starts_at or grid[0][0], ends_at or grid[-1][1]))
+    return {
+        table.pk: [
+            (starts_at, ends_at) for starts_at, ends_at in grid
+            if not any(starts_at < busy_end and ends_at > busy_start for busy_start, busy_end in taken[table.pk])
+        ]
+        for table in tables
+    }
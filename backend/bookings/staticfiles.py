@@ -0,0 +1,195 @@
+import gzip
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.html', '.js', '.json', '.map', '.mjs', '.svg', '.txt', '.xml'}
+# Below this, compression saves less than a packet.
+MIN_COMPRESS_SIZE = 512
+# ManifestStaticFilesStorage inserts the first 12 hex digits of the MD5.
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest-hashed static files with ``.gz`` (and, when the ``brotli``
+    package is installed, ``.br``) siblings written during ``collectstatic``,
+    so requests never pay for compression.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in {*paths, *self.hashed_files.values()}:
+            if os.path.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS:
+                self._compress(Path(self.path(name)))
+
+    @staticmethod
+    def _compress(path: Path) -> None:
+        data = path.read_bytes()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data)))
+        for suffix, compressed in variants:
+            target = path.with_name(path.name + suffix)
+            if len(compressed) < len(data) * 0.95:
+                target.write_bytes(compressed)
+            else:
+                target.unlink(missing_ok=True)
+
+
+def _not_modified(request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in (tag.strip() for tag in if_none_match.split(',')) or if_none_match.strip() == '*'
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and int(mtime) <= since
+
+
+def _accepted_encodings(header: str) -> dict[str, float]:
+    """Map each content-coding of an ``Accept-Encoding`` header to its q-value."""
+    accepted = {}
+    for part in header.split(','):
+        coding, *params = part.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def _validators(stat) -> tuple[str, str]:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"', http_date(stat.st_mtime)
+
+
+def _resolve(root, path: str) -> Path:
+    # safe_join rejects paths escaping ``root`` (a 400 SuspiciousFileOperation).
+    full_path = Path(safe_join(root, path))
+    if not full_path.is_file():
+        raise Http404
+    return full_path
+
+
+def serve_static(request, path):
+    """
+    Serve a collected static file, picking a precompressed variant the client
+    accepts. Manifest-hashed names never change content, so they are cached
+    for a year without revalidation; anything else must be revalidated.
+    """
+    if settings.DEBUG:
+        # Uncollected files straight from the finders, as runserver does.
+        from django.contrib.staticfiles.views import serve
+
+        return serve(request, path, insecure=True)
+
+    full_path = _resolve(settings.STATIC_ROOT, path)
+    content_type, encoding = mimetypes.guess_type(full_path.name)
+    accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    content_encoding = None
+    if encoding is None and full_path.suffix in COMPRESSIBLE_EXTENSIONS:
+        # The client's most preferred variant on disk; brotli wins ties.
+        best, chosen = 0.0, None
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            quality = accepted.get(candidate, accepted.get('*', 0.0))
+            variant = full_path.with_name(full_path.name + suffix)
+            if quality > best and variant.is_file():
+                best, chosen = quality, (variant, candidate)
+        if chosen:
+            full_path, content_encoding = chosen
+
+    stat = full_path.stat()
+    etag, last_modified = _validators(stat)
+    if _not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(full_path.open('rb'), content_type=content_type or 'application/octet-stream')
+        response['Content-Length'] = stat.st_size
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    patch_vary_headers(response, ['Accept-Encoding'])
+    response['Cache-Control'] = IMMUTABLE if HASHED_NAME_RE.search(path) else 'public, max-age=0, must-revalidate'
+    return response
+
+
+def _file_range(full_path: Path, start: int, length: int):
+    with full_path.open('rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_media(request, path):
+    """
+    Serve an uploaded file with conditional GET and single-range support, so
+    browsers can resume downloads and seek without fetching the whole file.
+    """
+    full_path = _resolve(settings.MEDIA_ROOT, path)
+    stat = full_path.stat()
+    size = stat.st_size
+    etag, last_modified = _validators(stat)
+    content_type = mimetypes.guess_type(full_path.name)[0] or 'application/octet-stream'
+
+    headers = {
+        'ETag': etag,
+        'Last-Modified': last_modified,
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': f"public, max-age={settings.STATIC_SERVING['MEDIA_MAX_AGE']}",
+    }
+    if _not_modified(request, etag, stat.st_mtime):
+        return HttpResponseNotModified(headers=headers)
+
+    match = RANGE_RE.match(request.headers.get('Range', '').replace(' ', ''))
+    if_range = request.headers.get('If-Range')
+    if match and match.group(0) != 'bytes=-' and if_range in (None, etag, last_modified):
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+        if start >= size or start > end:
+            return HttpResponse(status=416, headers={**headers, 'Content-Range': f'bytes */{size}'})
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _file_range(full_path, start, length), status=206, content_type=content_type, headers=headers,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = length
+        return response
+
+    response = FileResponse(full_path.open('rb'), content_type=content_type, headers=headers)
+    response['Content-Length'] = size
+    return response
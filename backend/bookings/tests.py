@@ -1,10 +1,46 @@
+import asyncio
+import gzip
+import os
+import re
+import shutil
+import tempfile
+import threading
 from datetime import date, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from .models import PlaneClass, Room
+from .events import AvailabilityEvent, InMemoryEventBackend, PostgresEventBackend, get_broker, publish
+from .hashers import get_hashing_pool
+from .models import (
+    ArchivedBooking,
+    Booking,
+    GuestSurcharge,
+    Image,
+    OutboxMessage,
+    PlaneClass,
+    RateRule,
+    Room,
+    SearchDocument,
+    Table,
+    WaitlistEntry,
+)
+from .routers import PIN_HEADER
+from .throttling import LoginUsernameRateThrottle
 
 
 User = get_user_model()
@@ -28,6 +64,9 @@ class HotelWillaAPITests(APITestCase):
             amenities='Flat bed,Priority boarding',
             description='Business class test cabin',
         )
+        broker = mock.patch('bookings.events._broker', InMemoryEventBackend())
+        broker.start()
+        self.addCleanup(broker.stop)
 
     def test_rooms_endpoint_returns_array(self):
         response = self.client.get('/api/rooms/')
@@ -77,3 +116,777 @@ class HotelWillaAPITests(APITestCase):
         }
         response = self.client.post('/api/bookings/', payload, format='json')
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_availability_stream_pushes_booking_changes(self):
+        response = self.client.get('/api/availability/stream/', {'item_type': 'room'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = iter(response.streaming_content)
+        self.assertTrue(next(stream).startswith(b'retry:'))
+        # A WSGI worker parks a thread per stream, so their number is capped.
+        self.assertEqual(self.client.get('/api/availability/stream/').status_code, 503)
+
+        self.client.force_authenticate(user=self.standard_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/bookings/', {
+                'item_type': 'room',
+                'item_id': self.room.id,
+                'start_date': str(date.today() + timedelta(days=1)),
+                'end_date': str(date.today() + timedelta(days=2)),
+            }, format='json')
+
+        chunk = next(stream).decode()
+        self.assertIn('event: availability', chunk)
+        self.assertIn('"status": "pending"', chunk)
+        self.assertIn(f'"item_id": {self.room.id}', chunk)
+        # Closing fires request_finished, which must not drop the test transaction.
+        with mock.patch.object(connection, 'close_if_unusable_or_obsolete'):
+            response.close()
+        self.assertEqual(get_broker().subscriber_count, 0)
+
+    async def test_availability_stream_under_asgi_holds_no_thread(self):
+        response = await self.async_client.get('/api/availability/stream/', {'item_type': 'room'})
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        second = await self.async_client.get('/api/availability/stream/')
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+
+        # Published from another thread, as an on-commit hook in a WSGI worker would.
+        event = AvailabilityEvent(
+            item_type='room', item_id=self.room.id, start_date='2030-01-01', end_date='2030-01-02', status='pending',
+        )
+        await asyncio.to_thread(publish, event)
+        chunk = (await anext(stream)).decode()
+        self.assertIn('event: availability', chunk)
+        self.assertIn(f'"item_id": {self.room.id}', chunk)
+
+    def test_booking_side_effects_run_from_outbox(self):
+        self.client.force_authenticate(user=self.standard_user)
+        response = self.client.post('/api/bookings/', {
+            'item_type': 'room',
+            'item_id': self.room.id,
+            'start_date': str(date.today() + timedelta(days=1)),
+            'end_date': str(date.today() + timedelta(days=2)),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.payload, {'booking_id': response.json()['id']})
+        self.assertEqual(len(mail.outbox), 0)
+
+        call_command('run_worker', '--once', '--workers=1', stdout=StringIO())
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.STATUS_DONE)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['guest@example.com'])
+
+    def test_expired_hold_frees_dates_and_is_cancelled(self):
+        start = date.today() + timedelta(days=1)
+        hold = Booking.objects.create(
+            user=self.standard_user,
+            item_type=Booking.ITEM_ROOM,
+            item_id=self.room.id,
+            start_date=start,
+            end_date=start + timedelta(days=2),
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post('/api/bookings/', {
+            'item_type': 'room',
+            'item_id': self.room.id,
+            'start_date': str(start),
+            'end_date': str(start + timedelta(days=1)),
+            'hold': True,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(response.json()['expires_at'])
+        confirmed = self.client.post(f"/api/bookings/{response.json()['id']}/confirm/")
+        self.assertEqual(confirmed.json()['status'], Booking.STATUS_CONFIRMED)
+        self.assertIsNone(confirmed.json()['expires_at'])
+
+        Booking.objects.create(
+            user=self.standard_user,
+            item_type=Booking.ITEM_ROOM,
+            item_id=self.room.id,
+            start_date=start + timedelta(days=5),
+            end_date=start + timedelta(days=6),
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        # One locking read, one UPDATE and one INSERT per batch, whatever its size.
+        with CaptureQueriesContext(connection) as queries:
+            call_command('expire_holds', stdout=StringIO())
+        statements = [q['sql'] for q in queries.captured_queries]
+        self.assertEqual(sum(sql.startswith('SELECT') for sql in statements), 2)
+        self.assertEqual(sum(sql.startswith('INSERT') for sql in statements), 1)
+        hold.refresh_from_db()
+        self.assertEqual(hold.status, Booking.STATUS_CANCELLED)
+        # The confirmed booking no longer expires; the released hold goes to the waitlist.
+        self.assertEqual(Booking.objects.get(pk=response.json()['id']).status, Booking.STATUS_CONFIRMED)
+        self.assertEqual(OutboxMessage.objects.filter(topic=OutboxMessage.TOPIC_BOOKING_CANCELLED).count(), 2)
+        late = self.client.post(f'/api/bookings/{hold.pk}/confirm/')
+        self.assertEqual(late.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Without ``hold`` (as the frontend books), nothing expires.
+        direct = self.client.post('/api/bookings/', {
+            'item_type': 'room',
+            'item_id': self.room.id,
+            'start_date': str(start + timedelta(days=3)),
+            'end_date': str(start + timedelta(days=4)),
+        }, format='json')
+        self.assertIsNone(direct.json()['expires_at'])
+
+    def test_archived_bookings_listed_only_on_request(self):
+        start = date.today() - timedelta(days=800)
+        old = Booking.objects.create(
+            user=self.standard_user,
+            item_type=Booking.ITEM_ROOM,
+            item_id=self.room.id,
+            start_date=start,
+            end_date=start + timedelta(days=2),
+            status=Booking.STATUS_CONFIRMED,
+        )
+        call_command('archive_bookings', '--days=365', stdout=StringIO())
+        self.assertFalse(Booking.objects.filter(pk=old.pk).exists())
+        self.assertTrue(ArchivedBooking.objects.filter(pk=old.pk).exists())
+
+        self.client.force_authenticate(user=self.admin_user)
+        hot = self.client.get('/api/bookings/').json()
+        self.assertEqual(hot['count'], 0)
+        everything = self.client.get('/api/bookings/', {'include_archived': 1}).json()
+        self.assertEqual(everything['count'], 1)
+        self.assertEqual(everything['results'][0]['id'], old.pk)
+        self.assertEqual(everything['results'][0]['item_name'], '101')
+
+    def test_stateless_jwt_skips_user_lookup_until_revoked(self):
+        self.addCleanup(cache.clear)
+        tokens = self.client.post('/api/auth/login/', {
+            'username': 'guest',
+            'password': 'guestpass123',
+        }, format='json').json()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        # A per-process cache cannot be trusted, so the revocation table is
+        # read; there is still no auth_user lookup.
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/bookings/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('auth_user' in query['sql'] for query in queries))
+        # Behind a shared cache, only the pagination COUNT runs once warm.
+        with mock.patch('bookings.authentication.cache_is_shared', return_value=True):
+            self.client.get('/api/bookings/')
+            with self.assertNumQueries(1):
+                self.client.get('/api/bookings/')
+
+            # Revoked within the same second the tokens were issued.
+            self.standard_user.set_password('newguestpass123')
+            self.standard_user.save()
+            response = self.client.get('/api/bookings/')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/api/bookings/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        refresh = self.client.post('/api/auth/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(refresh.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        fresh = self.client.post('/api/auth/login/', {
+            'username': 'guest',
+            'password': 'newguestpass123',
+        }, format='json').json()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {fresh['access']}")
+        self.assertEqual(self.client.get('/api/bookings/').status_code, status.HTTP_200_OK)
+
+        self.standard_user.delete()
+        self.assertEqual(self.client.get('/api/bookings/').status_code, status.HTTP_401_UNAUTHORIZED)
+        refresh = self.client.post('/api/auth/refresh/', {'refresh': fresh['refresh']}, format='json')
+        self.assertEqual(refresh.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_is_rate_limited_per_username(self):
+        self.addCleanup(cache.clear)
+        credentials = {'username': 'guest', 'password': 'wrong-password'}
+        with mock.patch.dict(LoginUsernameRateThrottle.THROTTLE_RATES, {'login_username': '2/min'}):
+            for _ in range(2):
+                response = self.client.post('/api/auth/login/', credentials, format='json')
+                self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            response = self.client.post('/api/auth/login/', credentials, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        malformed = self.client.post('/api/auth/login/', [], format='json')
+        self.assertEqual(malformed.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_login_rejected_fast_when_hashing_pool_is_saturated(self):
+        self.addCleanup(cache.clear)
+        pool = get_hashing_pool()
+        with mock.patch.object(pool, '_slots', threading.BoundedSemaphore(1)), \
+                mock.patch.object(pool, 'wait_seconds', 0):
+            pool._slots.acquire()
+            response = self.client.post('/api/auth/login/', {
+                'username': 'guest',
+                'password': 'guestpass123',
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            # Outside the API (admin login, changepassword) hashing waits for a slot.
+            hashed = []
+            worker = threading.Thread(target=lambda: hashed.append(make_password('guestpass123')))
+            worker.start()
+            worker.join(timeout=0.2)
+            self.assertTrue(worker.is_alive())
+            pool._slots.release()
+            worker.join(timeout=5)
+        self.assertTrue(hashed[0].startswith('pbkdf2_sha256$'))
+
+    def test_quote_applies_weekend_rules_and_guest_surcharge(self):
+        monday = date.today() + timedelta(days=7 - date.today().weekday())
+        RateRule.objects.create(name='Weekend', item_type='room', weekdays='5,6', percent=20)
+        GuestSurcharge.objects.create(item_type='room', included_guests=2, amount_per_guest=10)
+        Booking.objects.create(
+            user=self.standard_user,
+            item_type=Booking.ITEM_ROOM,
+            item_id=self.room.id,
+            start_date=monday,
+            end_date=monday + timedelta(days=1),
+        )
+        params = {
+            'item_type': 'room',
+            'start_date': str(monday),
+            'end_date': str(monday + timedelta(days=14)),
+            'guests': 3,
+        }
+        response = self.client.get('/api/quote/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        quote = response.json()[0]
+        self.assertEqual(quote['units'], 14)
+        self.assertEqual(quote['adjustments'], '159.99')
+        self.assertEqual(quote['guest_surcharge'], '140.00')
+        self.assertEqual(quote['total'], '3099.85')
+        self.assertFalse(quote['available'])
+
+        single = self.client.get('/api/quote/', {**params, 'item_id': self.room.id}).json()
+        self.assertEqual(single['total'], '3099.85')
+        with self.assertRaisesMessage(ValidationError, 'ISO weekday numbers'):
+            RateRule(name='Fridays', item_type='room', weekdays='Fri', percent=10).full_clean()
+
+    def test_search_ranks_catalog_matches(self):
+        Room.objects.create(
+            room_number='202',
+            room_type=Room.SUITE,
+            price_per_night=320,
+            description='Quiet suite with a workspace',
+            amenities='WiFi,Mini Bar',
+        )
+        response = self.client.get('/api/search/', {'q': 'wifi suite'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()['results']
+        self.assertEqual([r['title'] for r in results], ['Room 202 Suite', 'Room 101 Single'])
+
+        response = self.client.get('/api/search/', {'q': 'flat bed'})
+        self.assertEqual(response.json()['results'][0]['item_type'], 'plane')
+
+        call_command('rebuild_search_index', '--batch-size=1', stdout=StringIO())
+        response = self.client.get('/api/search/', {'q': 'wifi suite'})
+        self.assertEqual([r['title'] for r in response.json()['results']], ['Room 202 Suite', 'Room 101 Single'])
+
+    def test_rooms_filter_by_normalized_amenities(self):
+        Room.objects.create(
+            room_number='202',
+            room_type=Room.DOUBLE,
+            price_per_night=250,
+            description='Bar fridge room',
+            amenities='WiFi,Mini Bar',
+        )
+        response = self.client.get('/api/rooms/', {'amenities': 'wifi,minibar'})
+        results = response.json()['results']
+        self.assertEqual([room['room_number'] for room in results], ['202'])
+        self.assertEqual(results[0]['amenities'], 'WiFi,Mini Bar')
+        self.assertEqual(results[0]['amenity_list'], ['Mini Bar', 'WiFi'])
+        self.assertEqual(len(self.client.get('/api/rooms/', {'amenities': 'wifi'}).json()['results']), 2)
+
+    def test_rooms_filter_and_sort_server_side(self):
+        Room.objects.create(room_number='201', room_type=Room.SUITE, price_per_night=400, capacity=4, description='Suite')
+        Room.objects.create(room_number='202', room_type=Room.SUITE, price_per_night=300, capacity=3, description='Suite')
+        response = self.client.get('/api/rooms/', {
+            'room_type': 'suite',
+            'min_capacity': 3,
+            'max_price': 450,
+            'ordering': 'price_per_night',
+        })
+        self.assertEqual([room['room_number'] for room in response.json()['results']], ['202', '201'])
+        invalid = self.client.get('/api/rooms/', {'min_price': 'cheap'})
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('min_price', invalid.json())
+
+    def test_catalog_snapshot_loads_images_with_one_query(self):
+        image = Image.objects.create(title='Shared', external_url='https://example.com/shared.jpg')
+        self.room.images.add(image)
+        self.plane_class.images.add(image)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/catalog/snapshot/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        image_queries = [q for q in queries.captured_queries if '"bookings_image"' in q['sql']]
+        self.assertEqual(len(image_queries), 1)
+        data = response.json()
+        self.assertEqual(data['rooms'][0]['images'][0]['url'], 'https://example.com/shared.jpg')
+        self.assertEqual(data['plane_classes'][0]['images'][0]['id'], image.id)
+        self.assertEqual(data['tables'], [])
+
+    def test_staff_export_streams_csv_and_ndjson(self):
+        start = date.today() + timedelta(days=3)
+        Booking.objects.create(
+            user=self.standard_user,
+            item_type=Booking.ITEM_PLANE,
+            item_id=self.plane_class.id,
+            start_date=start,
+            end_date=start + timedelta(days=1),
+            notes='=HYPERLINK("https://example.com")',
+        )
+        self.client.force_authenticate(user=self.standard_user)
+        self.assertEqual(
+            self.client.get('/api/bookings/export/', {'format': 'csv'}).status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get('/api/bookings/export/', {'format': 'csv', 'from': str(start)})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:5], ['id', 'username', 'item_type', 'item_id', 'item_name'])
+        self.assertIn(',guest,plane,', lines[1])
+        self.assertIn(',Business,', lines[1])
+        self.assertIn(',"\'=HYPERLINK(""https://example.com"")",', lines[1])
+
+        response = self.client.get('/api/bookings/export/', {'format': 'ndjson', 'to': str(start - timedelta(days=1))})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    def test_catalog_import_upserts_on_natural_key_atomically(self):
+        image = Image.objects.create(title='Lobby', external_url='https://example.com/lobby.jpg')
+        upload = SimpleUploadedFile('rooms.csv', (
+            "room_number,room_type,price_per_night,capacity,description,amenities,image_ids\n"
+            f"101,deluxe,350.00,3,Renovated,\"WiFi,Mini Bar\",{image.id}\n"
+            "102,double,180.00,2,Garden view,WiFi,\n"
+        ).encode())
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post('/api/catalog/import/', {'type': 'room', 'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'created': 1, 'updated': 1})
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.room_type, self.room.room_type_display), (Room.DELUXE, 'Deluxe'))
+        self.assertEqual(list(self.room.images.all()), [image])
+        self.assertEqual(sorted(self.room.amenity_tags.values_list('key', flat=True)), ['minibar', 'wifi'])
+        self.assertTrue(SearchDocument.objects.filter(item_type='room', title='Room 102 Double').exists())
+
+        # An empty image_ids cell keeps the images already linked.
+        upload = SimpleUploadedFile('rooms.csv', (
+            "room_number,room_type,price_per_night,capacity,description,amenities,image_ids\n"
+            "101,deluxe,360.00,3,Renovated,WiFi,\n"
+        ).encode())
+        response = self.client.post('/api/catalog/import/', {'type': 'room', 'file': upload}, format='multipart')
+        self.assertEqual(response.json(), {'created': 0, 'updated': 1})
+        self.assertEqual(list(self.room.images.all()), [image])
+        for content in (b'room_number,description\n101,"' + b'x' * 200_000 + b'"\n', b'room_number\n\xff\xfe\n'):
+            upload = SimpleUploadedFile('rooms.csv', content)
+            response = self.client.post('/api/catalog/import/', {'type': 'room', 'file': upload}, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'tables.ndjson')
+        with open(path, 'w') as handle:
+            handle.write('{"name": "Patio", "seats": 4, "price": "20.00", "table_type": "4", "description": "Outside"}\n'
+                         '{"name": "Bar", "seats": 2, "price": "oops", "table_type": "2", "description": "Inside"}\n')
+        with self.assertRaisesMessage(CommandError, 'row 2'):
+            call_command('import_catalog', 'table', path, stdout=StringIO())
+        with open(path, 'w') as handle:
+            handle.write('{"name": "Patio", "seats": 4, "price": "20.00", "table_type": "4", "description": "Outside"}\n'
+                         '{"name": "Bar",\n')
+        with self.assertRaisesMessage(CommandError, 'could not be parsed'):
+            call_command('import_catalog', 'table', path, stdout=StringIO())
+        self.assertFalse(Table.objects.exists())
+
+    def test_booking_admin_resolves_item_names_per_page(self):
+        start = date.today() + timedelta(days=5)
+        for offset in range(3):
+            Booking.objects.create(
+                user=self.standard_user,
+                item_type=Booking.ITEM_ROOM,
+                item_id=self.room.id,
+                start_date=start + timedelta(days=offset * 2),
+                end_date=start + timedelta(days=offset * 2 + 1),
+            )
+        self.client.force_login(self.admin_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/bookings/booking/', {'q': 'guest'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, '<td class="field-item">101</td>', count=3, html=True)
+        room_queries = [q for q in queries.captured_queries if 'FROM "bookings_room"' in q['sql']]
+        self.assertEqual(len(room_queries), 1)
+
+    def test_booking_summary_aggregates_in_one_query(self):
+        today = date.today()
+        for start, nights, booking_status in [
+            (today + timedelta(days=4), 3, Booking.STATUS_CONFIRMED),
+            (today - timedelta(days=10), 2, Booking.STATUS_CONFIRMED),
+            (today + timedelta(days=20), 5, Booking.STATUS_CANCELLED),
+        ]:
+            Booking.objects.create(
+                user=self.standard_user,
+                item_type=Booking.ITEM_ROOM,
+                item_id=self.room.id,
+                start_date=start,
+                end_date=start + timedelta(days=nights),
+                status=booking_status,
+            )
+        self.client.force_authenticate(user=self.standard_user)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/bookings/summary/')
+        self.assertEqual(response.json(), {'upcoming': 1, 'past': 1, 'total_nights': 5})
+
+    def test_cancel_and_reschedule_only_check_new_nights(self):
+        start = date.today() + timedelta(days=10)
+        booking = Booking.objects.create(
+            user=self.standard_user,
+            item_type=Booking.ITEM_ROOM,
+            item_id=self.room.id,
+            start_date=start,
+            end_date=start + timedelta(days=3),
+        )
+        Booking.objects.create(
+            user=self.admin_user,
+            item_type=Booking.ITEM_ROOM,
+            item_id=self.room.id,
+            start_date=start + timedelta(days=4),
+            end_date=start + timedelta(days=6),
+            status=Booking.STATUS_CONFIRMED,
+        )
+        self.client.force_authenticate(user=self.standard_user)
+        url = f'/api/bookings/{booking.id}/'
+
+        response = self.client.patch(url, {
+            'start_date': str(start + timedelta(days=1)),
+            'end_date': str(start + timedelta(days=4)),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['end_date'], str(start + timedelta(days=4)))
+
+        conflict = self.client.patch(url, {
+            'start_date': str(start + timedelta(days=1)),
+            'end_date': str(start + timedelta(days=5)),
+        }, format='json')
+        self.assertEqual(conflict.status_code, status.HTTP_409_CONFLICT)
+
+        # Shrinking claims no new nights, so nothing is checked for overlap.
+        with CaptureQueriesContext(connection) as queries:
+            shrunk = self.client.patch(url, {
+                'start_date': str(start + timedelta(days=1)),
+                'end_date': str(start + timedelta(days=3)),
+            }, format='json')
+        self.assertEqual(shrunk.status_code, status.HTTP_200_OK)
+        self.assertFalse([q['sql'] for q in queries.captured_queries if '"start_date" <' in q['sql']])
+        past = self.client.patch(url, {
+            'start_date': str(date.today() - timedelta(days=2)),
+            'end_date': str(start + timedelta(days=3)),
+        }, format='json')
+        self.assertEqual(past.status_code, status.HTTP_400_BAD_REQUEST)
+
+        events = get_broker().subscribe()
+        self.addCleanup(events.close)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'{url}cancel/')
+        self.assertEqual(response.json()['status'], Booking.STATUS_CANCELLED)
+        self.assertEqual(events.get(timeout=1).status, Booking.STATUS_CANCELLED)
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.post(f'{url}cancel/')
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        # One conditional UPDATE and no overlap check.
+        statements = [q['sql'] for q in queries.captured_queries]
+        self.assertEqual(sum(sql.startswith('UPDATE') for sql in statements), 1)
+        self.assertFalse([sql for sql in statements if '"start_date" <' in sql])
+
+        self.client.force_authenticate(user=User.objects.create_user('other', 'o@example.com', 'otherpass123'))
+        self.assertEqual(self.client.post(f'{url}cancel/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.post('/api/bookings/abc/cancel/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cancellation_promotes_waitlist_by_priority_off_request_path(self):
+        start = date.today() + timedelta(days=7)
+        booking = Booking.objects.create(
+            user=self.standard_user,
+            item_type=Booking.ITEM_ROOM,
+            item_id=self.room.id,
+            start_date=start,
+            end_date=start + timedelta(days=4),
+            status=Booking.STATUS_CONFIRMED,
+        )
+        early = User.objects.create_user('early', 'early@example.com', 'earlypass123')
+        vip = User.objects.create_user('vip', 'vip@example.com', 'vippass1234')
+        self.client.force_authenticate(user=early)
+        response = self.client.post('/api/waitlist/', {
+            'item_type': 'room',
+            'item_id': self.room.id,
+            'start_date': str(start + timedelta(days=1)),
+            'end_date': str(start + timedelta(days=3)),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        past = self.client.post('/api/waitlist/', {
+            'item_type': 'room',
+            'item_id': self.room.id,
+            'start_date': str(date.today() - timedelta(days=1)),
+            'end_date': str(start),
+        }, format='json')
+        self.assertEqual(past.status_code, status.HTTP_400_BAD_REQUEST)
+        WaitlistEntry.objects.create(
+            user=vip,
+            item_type=Booking.ITEM_ROOM,
+            item_id=self.room.id,
+            start_date=start,
+            end_date=start + timedelta(days=2),
+            priority=5,
+        )
+
+        self.client.force_authenticate(user=self.standard_user)
+        self.client.post(f'/api/bookings/{booking.id}/cancel/')
+        self.assertFalse(Booking.objects.exclude(pk=booking.pk).exists())
+
+        call_command('run_worker', '--once', '--workers=1', stdout=StringIO())
+
+        promoted = Booking.objects.exclude(pk=booking.pk).get()
+        self.assertEqual((promoted.user, promoted.status), (vip, Booking.STATUS_PENDING))
+        self.assertEqual(WaitlistEntry.objects.get(user=vip).booking, promoted)
+        self.assertEqual(WaitlistEntry.objects.get(user=early).status, WaitlistEntry.STATUS_WAITING)
+
+        # Giving up nights by shortening a booking offers them on as well.
+        self.client.force_authenticate(user=vip)
+        response = self.client.patch(f'/api/bookings/{promoted.id}/', {
+            'start_date': str(start),
+            'end_date': str(start + timedelta(days=1)),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        call_command('run_worker', '--once', '--workers=1', stdout=StringIO())
+        self.assertEqual(WaitlistEntry.objects.get(user=early).status, WaitlistEntry.STATUS_PROMOTED)
+
+    def test_itinerary_books_all_items_or_none(self):
+        start = date.today() + timedelta(days=12)
+        table = Table.objects.create(name='Window', seats=2, price=15, table_type='2', description='By the window')
+        itinerary = {'items': [
+            {'item_type': 'room', 'item_id': self.room.id,
+             'start_date': str(start), 'end_date': str(start + timedelta(days=2))},
+            {'item_type': 'table', 'item_id': table.id,
+             'start_date': str(start), 'end_date': str(start + timedelta(days=1))},
+            {'item_type': 'plane', 'item_id': self.plane_class.id,
+             'start_date': str(start + timedelta(days=2)), 'end_date': str(start + timedelta(days=3))},
+        ]}
+        PlaneClass.objects.filter(pk=self.plane_class.pk).update(capacity=1)
+        Booking.objects.create(
+            user=self.admin_user,
+            item_type=Booking.ITEM_PLANE,
+            item_id=self.plane_class.id,
+            start_date=start + timedelta(days=2),
+            end_date=start + timedelta(days=3),
+        )
+        self.client.force_authenticate(user=self.standard_user)
+        response = self.client.post('/api/bookings/itinerary/', itinerary, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.json()['items'], ['Item 3 is not available for the selected dates.'])
+        self.assertFalse(Booking.objects.filter(user=self.standard_user).exists())
+
+        itinerary['items'][2]['start_date'] = str(start + timedelta(days=3))
+        itinerary['items'][2]['end_date'] = str(start + timedelta(days=4))
+        response = self.client.post('/api/bookings/itinerary/', itinerary, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([booking['item_name'] for booking in response.json()], ['101', 'Window', 'Business'])
+        self.assertEqual(OutboxMessage.objects.count(), 3)
+
+    def test_tables_book_time_slots_and_list_open_slots(self):
+        day = date.today() + timedelta(days=3)
+        table = Table.objects.create(name='Corner', seats=4, price=25, table_type='4', description='Quiet corner')
+        Table.objects.create(name='Bar', seats=2, price=10, table_type='2', description='At the bar')
+        self.client.force_authenticate(user=self.standard_user)
+
+        def book(hour, minute=0):
+            return self.client.post('/api/bookings/', {
+                'item_type': 'table',
+                'item_id': table.id,
+                'starts_at': f'{day}T{hour:02d}:{minute:02d}:00Z',
+            }, format='json')
+
+        first = book(18)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(first.json()['ends_at'], f'{day}T19:30:00Z')
+        self.assertEqual((first.json()['start_date'], first.json()['end_date']), (str(day), str(day + timedelta(days=1))))
+        self.assertEqual(book(19).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(book(19, 30).status_code, status.HTTP_201_CREATED)
+        # Off the grid: before opening, between steps, or longer than a slot.
+        self.assertEqual(book(3).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(book(21, 10).status_code, status.HTTP_400_BAD_REQUEST)
+        too_long = self.client.post('/api/bookings/', {
+            'item_type': 'table',
+            'item_id': table.id,
+            'starts_at': f'{day}T21:00:00Z',
+            'ends_at': f'{day + timedelta(days=3)}T21:00:00Z',
+        }, format='json')
+        self.assertEqual(too_long.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tables/slots/', {'date': str(day), 'ordering': 'name'})
+        self.assertEqual(len([q for q in queries.captured_queries if '"bookings_booking"' in q['sql']]), 1)
+        bar, corner = response.json()
+        self.assertEqual(len(bar['slots']), 10)
+        self.assertEqual(
+            [slot['starts_at'][11:16] for slot in corner['slots']],
+            ['21:00', '21:30'],
+        )
+
+    def test_shared_items_are_booked_up_to_capacity_per_day(self):
+        PlaneClass.objects.filter(pk=self.plane_class.pk).update(capacity=4)
+        start = date.today() + timedelta(days=20)
+
+        def book(offset, nights, guests):
+            booking = Booking(
+                user=self.standard_user,
+                item_type=Booking.ITEM_PLANE,
+                item_id=self.plane_class.id,
+                start_date=start + timedelta(days=offset),
+                end_date=start + timedelta(days=offset + nights),
+                guests=guests,
+            )
+            booking.save()
+            return booking
+
+        book(0, 2, 2)
+        book(2, 2, 2)
+        # The overlapping total is 4, but no single day has more than 2 guests.
+        book(0, 4, 2)
+        with self.assertRaisesMessage(ValidationError, 'Only 4 guests'):
+            book(1, 1, 1)
+
+        response = self.client.get('/api/quote/', {
+            'item_type': 'plane',
+            'start_date': str(start + timedelta(days=4)),
+            'end_date': str(start + timedelta(days=5)),
+            'guests': 4,
+        })
+        self.assertTrue(response.json()[0]['available'])
+
+    def test_profile_imports_reports_cold_start(self):
+        out = StringIO()
+        call_command('profile_imports', '--target=setup', '--limit=1000', stdout=out)
+        report = out.getvalue()
+        self.assertIn('modules imported in', report)
+        self.assertIn('django', report)
+        # App startup must not pull in the API stack; views load it on demand.
+        self.assertNotIn('rest_framework_simplejwt', report)
+
+    def test_collected_static_is_hashed_precompressed_and_immutable(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        storages = {**settings.STORAGES, 'staticfiles': {
+            'BACKEND': 'bookings.staticfiles.CompressedManifestStaticFilesStorage',
+        }}
+        # Without the optional brotli package only .gz files are written.
+        with self.settings(STATIC_ROOT=static_root, STORAGES=storages), mock.patch('bookings.staticfiles.brotli', None):
+            call_command('collectstatic', '--noinput', verbosity=0)
+            self.assertFalse(any(name.endswith('.br') for _, _, names in os.walk(static_root) for name in names))
+            page = self.client.get('/')
+            self.assertEqual(page['Cache-Control'], 'no-cache')
+            bundle = re.search(r'src="(/static/assets/index-[\w.-]+\.js)"', page.content.decode()).group(1)
+            self.assertRegex(bundle, r'\.[0-9a-f]{12}\.js$')
+
+            response = self.client.get(bundle, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+            self.assertIn('Accept-Encoding', response['Vary'])
+            body = gzip.decompress(b''.join(response.streaming_content))
+            self.assertEqual(body, (settings.BASE_DIR / 'static' / 'assets' / 'index-C0HoOgNK.js').read_bytes())
+
+            cached = self.client.get(bundle, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+            refused = self.client.get(bundle, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+            self.assertNotIn('Content-Encoding', refused)
+            plain = self.client.get('/static/assets/index-C0HoOgNK.js')
+            self.assertNotIn('Content-Encoding', plain)
+            self.assertEqual(plain['Cache-Control'], 'public, max-age=0, must-revalidate')
+
+    def test_media_supports_byte_ranges(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        content = bytes(range(256)) * 8
+        with open(os.path.join(media_root, 'photo.jpg'), 'wb') as photo:
+            photo.write(content)
+        with self.settings(MEDIA_ROOT=media_root):
+            full = self.client.get('/media/photo.jpg')
+            self.assertEqual(full['Accept-Ranges'], 'bytes')
+            self.assertEqual(b''.join(full.streaming_content), content)
+
+            partial = self.client.get('/media/photo.jpg', HTTP_RANGE='bytes=100-199')
+            self.assertEqual(partial.status_code, status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(partial['Content-Range'], f'bytes 100-199/{len(content)}')
+            self.assertEqual(b''.join(partial.streaming_content), content[100:200])
+
+            suffix = self.client.get('/media/photo.jpg', HTTP_RANGE='bytes=-10')
+            self.assertEqual(b''.join(suffix.streaming_content), content[-10:])
+            stale = self.client.get('/media/photo.jpg', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+            self.assertEqual(stale.status_code, status.HTTP_200_OK)
+            beyond = self.client.get('/media/photo.jpg', HTTP_RANGE=f'bytes={len(content)}-')
+            self.assertEqual(beyond.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.assertEqual(self.client.get('/media/missing.jpg').status_code, status.HTTP_404_NOT_FOUND)
+
+
+@skipUnless('replica' in settings.DATABASES, "Run with --settings=config.settings_test for two databases.")
+class ReplicaRoutingTests(APITestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'adminpass123')
+        # bulk_create skips the save signals, which would write derived rows to the primary.
+        Room.objects.using('replica').bulk_create([
+            Room(room_number='R1', room_type=Room.SINGLE, price_per_night=100, description='Replica only'),
+        ])
+
+    def test_catalog_reads_use_replica_and_writes_use_primary(self):
+        self.addCleanup(cache.clear)
+        response = self.client.get('/api/rooms/')
+        self.assertEqual([room['room_number'] for room in response.json()['results']], ['R1'])
+
+        self.client.force_authenticate(user=self.admin_user)
+        created = self.client.post('/api/rooms/', {
+            'room_number': 'P1',
+            'room_type': Room.DOUBLE,
+            'price_per_night': '150.00',
+            'description': 'Primary',
+        }, format='json')
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Room.objects.using('default').filter(room_number='P1').exists())
+        self.assertFalse(Room.objects.using('replica').filter(room_number='P1').exists())
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        self.client.force_authenticate(user=self.admin_user)
+        dashboard = self.client.get('/api/dashboard/').json()
+        self.assertEqual(dashboard['total_rooms'], 1)
+
+        created = self.client.post('/api/rooms/', {
+            'room_number': 'P1',
+            'room_type': Room.DOUBLE,
+            'price_per_night': '150.00',
+            'description': 'Primary',
+        }, format='json')
+        # The client echoes the signed pin header, so any worker honours it.
+        response = self.client.get('/api/rooms/', HTTP_X_PRIMARY_PIN=created[PIN_HEADER])
+        self.assertEqual([room['room_number'] for room in response.json()['results']], ['P1'])
+
+        for pin in (None, str(self.admin_user.pk)):
+            headers = {'HTTP_X_PRIMARY_PIN': pin} if pin else {}
+            response = self.client.get('/api/rooms/', **headers)
+            self.assertEqual([room['room_number'] for room in response.json()['results']], ['R1'])
+
+
+@skipUnless(connection.vendor == 'postgresql', "LISTEN/NOTIFY needs PostgreSQL.")
+class PostgresEventBackendTests(TransactionTestCase):
+    def test_events_reach_subscribers_in_other_processes(self):
+        # Two backends stand in for a web worker and the process publishing.
+        listener, publisher = PostgresEventBackend(), PostgresEventBackend()
+        subscription = listener.subscribe()
+        self.addCleanup(listener.close)
+        self.assertTrue(listener.listening.wait(timeout=5))
+
+        with transaction.atomic():
+            publisher.publish(AvailabilityEvent('room', 7, '2030-01-01', '2030-01-02', 'cancelled'))
+            # NOTIFY is only delivered when the publishing transaction commits.
+            self.assertIsNone(subscription.get(timeout=0.5))
+        event = subscription.get(timeout=5)
+        self.assertEqual((event.item_type, event.item_id, event.status), ('room', 7, 'cancelled'))
+
@@ -0,0 +1,25 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class AuthIPRateThrottle(SimpleRateThrottle):
+    """Limit sign-in and sign-up attempts per client IP, authenticated or not."""
+
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginUsernameRateThrottle(SimpleRateThrottle):
+    """Limit sign-in attempts per target username, across all client IPs."""
+
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        if not isinstance(request.data, dict):
+            # Left for the serializer to reject; AuthIPRateThrottle still applies.
+            return None
+        username = str(request.data.get('username', '')).strip().lower()
+        if not username:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': username}
@@ -1,18 +1,24 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (
+    AvailabilityStreamView,
     BookingViewSet,
+    CatalogImportView,
+    CatalogSnapshotView,
     DashboardView,
     ImageViewSet,
     OccasionViewSet,
     PlaneClassViewSet,
+    QuoteView,
     RegisterView,
     ResortPackageViewSet,
     RoomViewSet,
+    SearchView,
     TableViewSet,
+    WaitlistViewSet,
     HotelWillaTokenObtainPairView,
+    HotelWillaTokenRefreshView,
 )
 
 router = DefaultRouter()
@@ -23,12 +29,18 @@ router.register(r'plane-classes', PlaneClassViewSet)
 router.register(r'occasions', OccasionViewSet)
 router.register(r'bookings', BookingViewSet, basename='booking')
 router.register(r'images', ImageViewSet)
+router.register(r'waitlist', WaitlistViewSet, basename='waitlist')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('availability/stream/', AvailabilityStreamView.as_view(), name='availability_stream'),
+    path('catalog/snapshot/', CatalogSnapshotView.as_view(), name='catalog_snapshot'),
+    path('catalog/import/', CatalogImportView.as_view(), name='catalog_import'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('quote/', QuoteView.as_view(), name='quote'),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
     path('auth/register/', RegisterView.as_view(), name='register'),
     path('auth/login/', HotelWillaTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/refresh/', HotelWillaTokenRefreshView.as_view(), name='token_refresh'),
 ]
 
@@ -1,70 +1,207 @@
+import io
 import logging
+import threading
+import time
+from collections import defaultdict
 from datetime import date, timedelta
+from functools import partial
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework import mixins, permissions, status, viewsets
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import BooleanField, Value
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
+from rest_framework import generics, mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.parsers import FormParser, MultiPartParser, JSONParser
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework_simplejwt.views import TokenObtainPairView
-
-from .models import Booking, Image, Occasion, PlaneClass, ResortPackage, Room, Table
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from .authentication import ISSUED_AT_CLAIM, check_not_revoked
+from .events import AvailabilityEvent, booking_event, get_broker, publish
+from .exports import stream_csv, stream_ndjson
+from .filters import AmenityFilterBackend, CatalogFilterBackend
+from .hashers import reject_when_saturated
+from .images import get_image_map
+from .itinerary import book_itinerary
+from .models import (
+    BOOKABLE_MODELS,
+    ArchivedBooking,
+    Booking,
+    Image,
+    Occasion,
+    PlaneClass,
+    ResortPackage,
+    Room,
+    SearchDocument,
+    Table,
+    WaitlistEntry,
+    lock_bookable_items,
+    peak_guests,
+)
 from .permissions import IsAdminOrReadOnly
+from .pricing import QuoteEngine
+from .renderers import CSVRenderer, NDJSONRenderer
+from .routers import is_pinned_to_primary, start_replica_reads, stop_replica_reads
+from .search import search
+from .slots import open_slots
 from .serializers import (
+    BookingDatesSerializer,
+    BookingExportSerializer,
     BookingSerializer,
+    BookingSummarySerializer,
     ImageSerializer,
+    ItinerarySerializer,
     OccasionSerializer,
     PlaneClassSerializer,
+    QuoteRequestSerializer,
+    QuoteSerializer,
     ResortPackageSerializer,
     RoomSerializer,
+    SearchResultSerializer,
     TableSerializer,
+    TableSlotsRequestSerializer,
+    TableSlotsSerializer,
     UserSerializer,
+    WaitlistEntrySerializer,
 )
+from .throttling import AuthIPRateThrottle, LoginUsernameRateThrottle
+from .waitlist import enqueue_promotion
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-class ImageViewSet(viewsets.ModelViewSet):
+def include_archived(request):
+    return request.query_params.get('include_archived') in ('1', 'true')
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe (read-only) requests from the read replica when one is configured.
+
+    Users who wrote within the last ``REPLICA_PIN_SECONDS`` keep reading from
+    the primary so they always see their own changes.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned_to_primary(request):
+            self._replica_token = start_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            stop_replica_reads(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class SharedImagesMixin:
+    """
+    Load catalog images through the request's shared identity map.
+
+    A list page costs one image query however many items (or catalog types)
+    it contains, instead of one prefetch per viewset.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        items = list(queryset if page is None else page)
+        get_image_map(request).attach(items)
+        serializer = self.get_serializer(items, many=True)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        get_image_map(request).attach([instance])
+        return Response(self.get_serializer(instance).data)
+
+
+class ImageViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Image.objects.all().order_by('-created_at')
     serializer_class = ImageSerializer
     permission_classes = [IsAdminOrReadOnly]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
 
-class RoomViewSet(viewsets.ModelViewSet):
-    queryset = Room.objects.all().prefetch_related('images').order_by('room_number')
+class RoomViewSet(ReplicaReadMixin, SharedImagesMixin, viewsets.ModelViewSet):
+    queryset = Room.objects.all().prefetch_related('amenity_tags').order_by('room_number')
     serializer_class = RoomSerializer
     permission_classes = [IsAdminOrReadOnly]
-
-
-class TableViewSet(viewsets.ModelViewSet):
-    queryset = Table.objects.all().prefetch_related('images').order_by('name')
+    filter_backends = [CatalogFilterBackend, AmenityFilterBackend, OrderingFilter]
+    catalog_filters = {
+        'room_type': 'room_type',
+        'min_price': 'price_per_night__gte',
+        'max_price': 'price_per_night__lte',
+        'min_capacity': 'capacity__gte',
+    }
+    ordering_fields = ['room_number', 'price_per_night', 'capacity']
+
+
+class TableViewSet(ReplicaReadMixin, SharedImagesMixin, viewsets.ModelViewSet):
+    queryset = Table.objects.all().order_by('name')
     serializer_class = TableSerializer
     permission_classes = [IsAdminOrReadOnly]
-
-
-class ResortPackageViewSet(viewsets.ModelViewSet):
-    queryset = ResortPackage.objects.all().prefetch_related('images').order_by('title')
+    filter_backends = [CatalogFilterBackend, OrderingFilter]
+    catalog_filters = {
+        'table_type': 'table_type',
+        'seats': 'seats',
+        'min_seats': 'seats__gte',
+        'min_price': 'price__gte',
+        'max_price': 'price__lte',
+    }
+    ordering_fields = ['name', 'price', 'seats']
+
+    @action(detail=False, permission_classes=[permissions.AllowAny])
+    def slots(self, request, *args, **kwargs):
+        """Open time slots on ``?date=`` for every table matching the usual list filters."""
+        params = TableSlotsRequestSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        tables = list(self.filter_queryset(self.get_queryset()))
+        free = open_slots(tables, params.validated_data['date'])
+        return Response(TableSlotsSerializer(tables, many=True, context={'open_slots': free}).data)
+
+
+class ResortPackageViewSet(ReplicaReadMixin, SharedImagesMixin, viewsets.ModelViewSet):
+    queryset = ResortPackage.objects.all().prefetch_related('amenity_tags').order_by('title')
     serializer_class = ResortPackageSerializer
     permission_classes = [IsAdminOrReadOnly]
+    filter_backends = [CatalogFilterBackend, AmenityFilterBackend, OrderingFilter]
+    catalog_filters = {
+        'min_price': 'price__gte',
+        'max_price': 'price__lte',
+    }
+    ordering_fields = ['title', 'price']
 
 
-class PlaneClassViewSet(viewsets.ModelViewSet):
-    queryset = PlaneClass.objects.all().prefetch_related('images').order_by('class_name')
+class PlaneClassViewSet(ReplicaReadMixin, SharedImagesMixin, viewsets.ModelViewSet):
+    queryset = PlaneClass.objects.all().prefetch_related('amenity_tags').order_by('class_name')
     serializer_class = PlaneClassSerializer
     permission_classes = [IsAdminOrReadOnly]
+    filter_backends = [CatalogFilterBackend, AmenityFilterBackend, OrderingFilter]
+    catalog_filters = {
+        'class_name': 'class_name',
+        'min_price': 'price__gte',
+        'max_price': 'price__lte',
+    }
+    ordering_fields = ['class_name', 'price']
     pagination_class = None
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data or [])
 
-
-class OccasionViewSet(viewsets.ModelViewSet):
-    queryset = Occasion.objects.all().prefetch_related('images').order_by('title')
+class OccasionViewSet(ReplicaReadMixin, SharedImagesMixin, viewsets.ModelViewSet):
+    queryset = Occasion.objects.all().order_by('title')
     serializer_class = OccasionSerializer
     permission_classes = [IsAdminOrReadOnly]
 
@@ -79,35 +216,225 @@ class BookingViewSet(mixins.CreateModelMixin,
         qs = Booking.objects.select_related('user').order_by('-created_at')
         if self.request.user.is_staff:
             return qs
-        return qs.filter(user=self.request.user)
+        return qs.filter(user_id=self.request.user.id)
+
+    def list(self, request, *args, **kwargs):
+        if not (request.user.is_staff and include_archived(request)):
+            return super().list(request, *args, **kwargs)
+
+        # Page over a narrow (id, created_at) union of both tables, then load
+        # only the rows on the requested page.
+        def timeline(model, archived):
+            return model.objects.order_by().annotate(
+                archived=Value(archived, output_field=BooleanField()),
+            ).values_list('id', 'created_at', 'archived')
+
+        combined = timeline(Booking, False).union(timeline(ArchivedBooking, True), all=True)
+        page = self.paginate_queryset(combined.order_by('-created_at', '-id'))
+        live = Booking.objects.select_related('user').in_bulk(
+            [pk for pk, _, archived in page if not archived]
+        )
+        history = ArchivedBooking.objects.select_related('user').in_bulk(
+            [pk for pk, _, archived in page if archived]
+        )
+        rows = [(history if archived else live)[pk] for pk, _, archived in page]
+        serializer = self.get_serializer(rows, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def partial_update(self, request, *args, **kwargs):
+        """
+        Move a booking to new dates.
+
+        Only the nights the booking does not already hold are checked for
+        conflicts, under a lock on the booked item, and the change is written
+        with a single UPDATE rather than a full ``save()``. Nights that have
+        already passed cannot be added, moved or dropped; nights given up are
+        offered to the waitlist.
+        """
+        dates = BookingDatesSerializer(data=request.data)
+        dates.is_valid(raise_exception=True)
+        start_date, end_date = dates.validated_data['start_date'], dates.validated_data['end_date']
+        booking = self.get_object()
+        if booking.is_time_slot:
+            return Response(
+                {'detail': "Table time slots cannot be moved; cancel and book a new slot."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        with transaction.atomic():
+            lock_bookable_items(booking.item_type, [booking.item_id])
+            # Re-read under the lock: the dates diffed below and the status
+            # checks must not come from before a concurrent change.
+            booking = Booking.objects.select_for_update().get(pk=booking.pk)
+            previous = (booking.start_date, booking.end_date)
+            if booking.status == Booking.STATUS_CANCELLED:
+                return Response(
+                    {'detail': "Cancelled bookings cannot be changed."}, status=status.HTTP_400_BAD_REQUEST,
+                )
+            if not Booking.objects.active().filter(pk=booking.pk).exists():
+                return Response(
+                    {'detail': "This hold has expired; book the dates again."}, status=status.HTTP_409_CONFLICT,
+                )
+            today = timezone.localdate()
+            if booking.end_date <= today:
+                return Response(
+                    {'detail': "Finished bookings cannot be changed."}, status=status.HTTP_400_BAD_REQUEST,
+                )
+            if end_date <= today or (start_date != booking.start_date and min(start_date, booking.start_date) < today):
+                return Response(
+                    {'detail': "Past nights cannot be changed."}, status=status.HTTP_400_BAD_REQUEST,
+                )
+            try:
+                booking.validate_availability(booking.newly_claimed(start_date, end_date))
+            except DjangoValidationError as exc:
+                return Response({'detail': exc.messages[0]}, status=status.HTTP_409_CONFLICT)
+            released = booking.released(start_date, end_date)
+            booking.start_date, booking.end_date, booking.updated_at = start_date, end_date, timezone.now()
+            Booking.objects.filter(pk=booking.pk).update(
+                start_date=start_date, end_date=end_date, updated_at=booking.updated_at,
+            )
+            for released_start, released_end in released:
+                enqueue_promotion(booking, released_start, released_end)
+            transaction.on_commit(partial(publish, AvailabilityEvent(
+                item_type=booking.item_type,
+                item_id=booking.item_id,
+                start_date=min(previous[0], start_date).isoformat(),
+                end_date=max(previous[1], end_date).isoformat(),
+                status=booking.status,
+            )))
+        return Response(self.get_serializer(booking).data)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, *args, **kwargs):
+        """
+        Cancel a booking that has not ended yet with one conditional UPDATE; repeating it is a no-op.
+
+        Waitlist matching for the released nights runs later on the outbox worker.
+        """
+        booking = self.get_object()
+        with transaction.atomic():
+            cancelled = Booking.objects.filter(
+                pk=booking.pk,
+                end_date__gt=timezone.localdate(),
+            ).exclude(status=Booking.STATUS_CANCELLED).update(
+                status=Booking.STATUS_CANCELLED,
+                expires_at=None,
+                updated_at=timezone.now(),
+            )
+            booking.refresh_from_db()
+            if cancelled:
+                enqueue_promotion(booking)
+                transaction.on_commit(partial(publish, booking_event(booking)))
+        if not cancelled and booking.status != Booking.STATUS_CANCELLED:
+            return Response({'detail': "Finished bookings cannot be cancelled."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(booking).data)
+
+    @action(detail=True, methods=['post'])
+    def confirm(self, request, *args, **kwargs):
+        """
+        Turn a pending hold into a confirmed booking (checkout), so it no longer
+        expires. Only a hold that is still live can be confirmed; repeating it is a no-op.
+        """
+        booking = self.get_object()
+        with transaction.atomic():
+            confirmed = Booking.objects.active().filter(pk=booking.pk, status=Booking.STATUS_PENDING).update(
+                status=Booking.STATUS_CONFIRMED,
+                expires_at=None,
+                updated_at=timezone.now(),
+            )
+            booking.refresh_from_db()
+            if confirmed:
+                transaction.on_commit(partial(publish, booking_event(booking)))
+        if booking.status == Booking.STATUS_CANCELLED:
+            return Response({'detail': "Cancelled bookings cannot be confirmed."}, status=status.HTTP_400_BAD_REQUEST)
+        if booking.status != Booking.STATUS_CONFIRMED:
+            return Response(
+                {'detail': "This hold has expired; book the dates again."}, status=status.HTTP_409_CONFLICT,
+            )
+        return Response(self.get_serializer(booking).data)
+
+    @action(detail=False, methods=['post'])
+    def itinerary(self, request, *args, **kwargs):
+        """Book several items (``items``: list of bookings) in one all-or-nothing request."""
+        itinerary = ItinerarySerializer(data=request.data)
+        itinerary.is_valid(raise_exception=True)
+        bookings = book_itinerary(
+            request.user.id, itinerary.validated_data['items'], hold=itinerary.validated_data['hold'],
+        )
+        return Response(self.get_serializer(bookings, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False)
+    def summary(self, request, *args, **kwargs):
+        """The requesting user's upcoming and past booking counts and total nights."""
+        summary = Booking.objects.filter(user_id=request.user.id).summary()
+        return Response(BookingSummarySerializer(summary).data)
+
+    @action(
+        detail=False,
+        permission_classes=[permissions.IsAdminUser],
+        renderer_classes=[CSVRenderer, NDJSONRenderer],
+    )
+    def export(self, request, *args, **kwargs):
+        """Stream bookings as CSV or NDJSON (``?format=``), optionally limited by start date ``from``/``to``."""
+        params = BookingExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = Booking.objects.order_by('pk')
+        if params.validated_data.get('from'):
+            queryset = queryset.filter(start_date__gte=params.validated_data['from'])
+        if params.validated_data.get('to'):
+            queryset = queryset.filter(start_date__lte=params.validated_data['to'])
+
+        export_format = request.accepted_renderer.format
+        chunk_size = settings.BOOKING_EXPORT_CHUNK_SIZE
+        if export_format == 'csv':
+            response = StreamingHttpResponse(stream_csv(queryset, chunk_size), content_type='text/csv')
+        else:
+            response = StreamingHttpResponse(stream_ndjson(queryset, chunk_size), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="bookings.{export_format}"'
+        return response
+
+
+class WaitlistViewSet(mixins.CreateModelMixin,
+                      mixins.ListModelMixin,
+                      mixins.DestroyModelMixin,
+                      viewsets.GenericViewSet):
+    """Join, list and leave waitlists for dates that could not be booked."""
+
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return WaitlistEntry.objects.filter(user_id=self.request.user.id)
 
 
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [AuthIPRateThrottle]
 
     def post(self, request, *args, **kwargs):
         serializer = UserSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
+        with reject_when_saturated():
+            user = serializer.save()
         return Response(UserSerializer(user).data, status=status.HTTP_201_CREATED)
 
 
-class DashboardView(APIView):
+class DashboardView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request, *args, **kwargs):
         total_rooms = Room.objects.count()
         total_resorts = ResortPackage.objects.count()
         total_bookings = Booking.objects.count()
+        if include_archived(request):
+            total_bookings += ArchivedBooking.objects.count()
         recent_bookings = Booking.objects.select_related('user').order_by('-created_at')[:5]
         serializer = BookingSerializer(recent_bookings, many=True)
 
         occupancy_rate = 0
         if total_rooms:
             last_30 = date.today() - timedelta(days=30)
-            relevant = Booking.objects.filter(
+            relevant = Booking.objects.active().filter(
                 item_type=Booking.ITEM_ROOM,
-                status__in=[Booking.STATUS_CONFIRMED, Booking.STATUS_PENDING],
                 end_date__gte=last_30,
             )
             total_nights = sum(
@@ -128,6 +455,219 @@ class DashboardView(APIView):
         return Response(data)
 
 
+class CatalogSnapshotView(ReplicaReadMixin, APIView):
+    """First ``limit`` items of every catalog type, for the home page, with one shared image query."""
+
+    permission_classes = [permissions.AllowAny]
+    sections = [
+        ('rooms', RoomViewSet),
+        ('tables', TableViewSet),
+        ('resorts', ResortPackageViewSet),
+        ('plane_classes', PlaneClassViewSet),
+        ('occasions', OccasionViewSet),
+    ]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 3)), 1), 12)
+        except ValueError:
+            limit = 3
+        items = {name: list(viewset.queryset[:limit]) for name, viewset in self.sections}
+        get_image_map(request).attach(item for section in items.values() for item in section)
+        context = {'request': request}
+        return Response({
+            name: viewset.serializer_class(items[name], many=True, context=context).data
+            for name, viewset in self.sections
+        })
+
+
+class CatalogImportView(APIView):
+    """
+    Staff upload of a catalog file (``file``, ``type``, optional ``format``), imported atomically.
+
+    Rows are streamed from the upload and upserted in batches; any invalid
+    row rejects the whole file.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ["Upload a CSV, JSON or NDJSON file."]}, status=status.HTTP_400_BAD_REQUEST)
+        # The importer's serializers are only needed here, so workers load them on first use.
+        from .importer import PARSE_ERRORS, CatalogImportError, import_catalog, read_rows
+
+        fmt = request.data.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+        fmt = {'jsonl': 'ndjson'}.get(fmt, fmt)
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            result = import_catalog(
+                request.data.get('type', ''),
+                read_rows(stream, fmt),
+                settings.CATALOG_IMPORT_BATCH_SIZE,
+            )
+        except CatalogImportError as exc:
+            return Response(exc.errors, status=status.HTTP_400_BAD_REQUEST)
+        except PARSE_ERRORS:
+            return Response({'file': ["The file could not be parsed."]}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            stream.detach()
+        return Response(result)
+
+
+class SearchView(generics.ListAPIView):
+    """Ranked full-text search across every catalog type via ``?q=``."""
+
+    serializer_class = SearchResultSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '').strip()
+        if not query:
+            return SearchDocument.objects.none()
+        return search(query)
+
+
+class QuoteView(APIView):
+    """
+    Price a stay for one item (``item_id``) or for every item of ``item_type``.
+
+    Bulk quotes include an ``available`` flag resolved with a single overlap query.
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        params = QuoteRequestSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        item_type = params.validated_data['item_type']
+        item_id = params.validated_data.get('item_id')
+        start_date = params.validated_data['start_date']
+        end_date = params.validated_data['end_date']
+        guests = params.validated_data['guests']
+
+        engine = QuoteEngine(item_type, start_date, end_date)
+        items = BOOKABLE_MODELS[item_type].objects.order_by('pk')
+        if item_id is not None:
+            item = items.filter(pk=item_id).first()
+            if item is None:
+                return Response({'detail': "Selected item is not available."}, status=status.HTTP_404_NOT_FOUND)
+            return Response(QuoteSerializer(engine.quote(item, guests)).data)
+
+        items = list(items)
+        booked = defaultdict(list)
+        for booked_id, start, end, booked_guests in Booking.objects.active().filter(
+            item_type=item_type,
+            start_date__lt=end_date,
+            end_date__gt=start_date,
+        ).values_list('item_id', 'start_date', 'end_date', 'guests'):
+            booked[booked_id].append((start, end, booked_guests))
+        quotes = engine.quote_many(items, guests)
+        if item_type in Booking.CAPACITY_ITEM_TYPES:
+            capacities = {item.pk: item.capacity for item in items}
+            for quote in quotes:
+                peak = peak_guests(booked[quote.item_id], start_date, end_date)
+                quote.available = peak + guests <= capacities[quote.item_id]
+        else:
+            for quote in quotes:
+                quote.available = not booked[quote.item_id]
+        return Response(QuoteSerializer(quotes, many=True).data)
+
+
+def _wanted(event, item_type, item_id) -> bool:
+    if item_type and event.item_type != item_type:
+        return False
+    return not item_id or str(event.item_id) == item_id
+
+
+class _ThreadedEventStream:
+    """
+    Event stream iterated by a WSGI thread. ``close()`` releases the
+    subscription and the stream slot even if iteration never started.
+    """
+
+    def __init__(self, subscription, slot, item_type, item_id):
+        self.subscription = subscription
+        self.slot = slot
+        self.item_type = item_type
+        self.item_id = item_id
+        self.closed = False
+
+    def __iter__(self):
+        heartbeat = settings.AVAILABILITY_EVENTS['HEARTBEAT_SECONDS']
+        deadline = time.monotonic() + settings.AVAILABILITY_EVENTS['MAX_STREAM_SECONDS']
+        yield "retry: 5000\n\n"
+        while time.monotonic() < deadline:
+            event = self.subscription.get(timeout=heartbeat)
+            if event is None:
+                yield ": keepalive\n\n"
+            elif _wanted(event, self.item_type, self.item_id):
+                yield event.to_sse()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.subscription.close()
+            self.slot.release()
+
+
+_threaded_stream_slots = None
+
+
+def _stream_slots():
+    global _threaded_stream_slots
+    if _threaded_stream_slots is None:
+        _threaded_stream_slots = threading.BoundedSemaphore(settings.AVAILABILITY_EVENTS['SYNC_STREAMS'])
+    return _threaded_stream_slots
+
+
+class AvailabilityStreamView(View):
+    """
+    Server-sent events feed of booking availability changes.
+
+    Optional ``item_type`` and ``item_id`` query parameters narrow the stream
+    to a single catalog type or item.
+
+    Under ASGI a stream is a coroutine waiting on its queue, so any number of
+    clients can be connected without tying up threads. A WSGI worker has to
+    park a thread per stream, so only ``AVAILABILITY_EVENTS['SYNC_STREAMS']``
+    are served per process there and further clients get a 503 and retry.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        item_type = request.GET.get('item_type')
+        item_id = request.GET.get('item_id')
+        if isinstance(request, ASGIRequest):
+            content = self._astream(get_broker().subscribe(asynchronous=True), item_type, item_id)
+        else:
+            slot = _stream_slots()
+            if not slot.acquire(blocking=False):
+                return HttpResponse(
+                    "Too many availability streams on this server.", status=503, headers={'Retry-After': '5'},
+                )
+            content = _ThreadedEventStream(get_broker().subscribe(), slot, item_type, item_id)
+        response = StreamingHttpResponse(content, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def _astream(self, subscription, item_type, item_id):
+        heartbeat = settings.AVAILABILITY_EVENTS['HEARTBEAT_SECONDS']
+        deadline = time.monotonic() + settings.AVAILABILITY_EVENTS['MAX_STREAM_SECONDS']
+        try:
+            yield "retry: 5000\n\n"
+            while time.monotonic() < deadline:
+                event = await subscription.aget(timeout=heartbeat)
+                if event is None:
+                    yield ": keepalive\n\n"
+                elif _wanted(event, item_type, item_id):
+                    yield event.to_sse()
+        finally:
+            subscription.close()
+
+
 class HotelWillaTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
@@ -135,6 +675,7 @@ class HotelWillaTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['username'] = user.username
         token['email'] = user.email or ''
         token['is_staff'] = user.is_staff
+        token[ISSUED_AT_CLAIM] = time.time()
         return token
 
     def validate(self, attrs):
@@ -150,3 +691,18 @@ class HotelWillaTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 class HotelWillaTokenObtainPairView(TokenObtainPairView):
     serializer_class = HotelWillaTokenObtainPairSerializer
+    throttle_classes = [AuthIPRateThrottle, LoginUsernameRateThrottle]
+
+    def post(self, request, *args, **kwargs):
+        with reject_when_saturated():
+            return super().post(request, *args, **kwargs)
+
+
+class HotelWillaTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        check_not_revoked(self.token_class(attrs['refresh']))
+        return super().validate(attrs)
+
+
+class HotelWillaTokenRefreshView(TokenRefreshView):
+    serializer_class = HotelWillaTokenRefreshSerializer
@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, OutboxMessage, WaitlistEntry, lock_bookable_items
+
+
+def _overlaps(start: date, end: date, taken: list[tuple[date, date]]) -> bool:
+    return any(start < taken_end and end > taken_start for taken_start, taken_end in taken)
+
+
+def promotion_message(booking, start_date: date | None = None, end_date: date | None = None) -> OutboxMessage:
+    """The unsaved outbox message asking for waitlist matching on nights ``booking`` released."""
+    return OutboxMessage(topic=OutboxMessage.TOPIC_BOOKING_CANCELLED, payload={
+        'item_type': booking.item_type,
+        'item_id': booking.item_id,
+        'start_date': (start_date or booking.start_date).isoformat(),
+        'end_date': (end_date or booking.end_date).isoformat(),
+    })
+
+
+def enqueue_promotion(booking, start_date: date | None = None, end_date: date | None = None) -> None:
+    """
+    Schedule waitlist matching, on the outbox worker, for the nights
+    ``booking`` released: ``[start_date, end_date)``, or all of its dates.
+    """
+    promotion_message(booking, start_date, end_date).save()
+
+
+def promote_waitlist(item_type: str, item_id: int, start_date: date, end_date: date) -> list[Booking]:
+    """
+    Turn waiting entries that fit into nights freed on ``[start_date, end_date)`` into bookings.
+
+    Only waiting entries overlapping the freed range are candidates, found
+    through the waitlist's partial interval index. Their conflicts are checked
+    in memory against one query for the active bookings in their combined
+    span, so the work grows with the number of candidates, not with the size
+    of the waitlist. Entries for shared (capacity) items are instead checked
+    against capacity as each is saved. Everything happens in one transaction
+    under the item lock taken by booking changes.
+    """
+    today = timezone.localdate()
+    with transaction.atomic():
+        if not lock_bookable_items(item_type, [item_id]):
+            return []
+        candidates = list(
+            WaitlistEntry.objects.select_for_update()
+            .filter(
+                item_type=item_type,
+                item_id=item_id,
+                status=WaitlistEntry.STATUS_WAITING,
+                start_date__gte=today,
+                start_date__lt=end_date,
+                end_date__gt=start_date,
+            )
+            .order_by('-priority', 'created_at')
+        )
+        if not candidates:
+            return []
+
+        taken = list(
+            Booking.objects.active()
+            .filter(
+                item_type=item_type,
+                item_id=item_id,
+                start_date__lt=max(entry.end_date for entry in candidates),
+                end_date__gt=min(entry.start_date for entry in candidates),
+            )
+            .values_list('start_date', 'end_date')
+        )
+        hold = timedelta(hours=settings.WAITLIST_HOLD_HOURS)
+        promoted = []
+        shared = item_type in Booking.CAPACITY_ITEM_TYPES
+        for entry in candidates:
+            if not shared and _overlaps(entry.start_date, entry.end_date, taken):
+                continue
+            try:
+                # Shared items are checked against their capacity on save.
+                with transaction.atomic():
+                    booking = Booking.objects.create(
+                        user_id=entry.user_id,
+                        item_type=item_type,
+                        item_id=item_id,
+                        start_date=entry.start_date,
+                        end_date=entry.end_date,
+                        guests=entry.guests,
+                        expires_at=timezone.now() + hold,
+                    )
+            except ValidationError:
+                continue
+            OutboxMessage.enqueue(OutboxMessage.TOPIC_BOOKING_CREATED, booking_id=booking.pk)
+            entry.status, entry.booking = WaitlistEntry.STATUS_PROMOTED, booking
+            entry.save(update_fields=['status', 'booking', 'updated_at'])
+            taken.append((entry.start_date, entry.end_date))
+            promoted.append(booking)
+        return promoted
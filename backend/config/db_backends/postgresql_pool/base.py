@@ -0,0 +1,71 @@
+"""
+PostgreSQL backend that keeps connections in an in-process psycopg2 pool.
+
+Django 4.2 has no built-in pooling, so this wrapper checks connections out
+of a ``ThreadedConnectionPool`` per database alias and returns them instead
+of closing them. Configure it through the ``POOL`` key of the database
+settings, e.g. ``{'MIN_SIZE': 1, 'MAX_SIZE': 10}``, and keep
+``CONN_MAX_AGE`` at 0 so connections go back to the pool after each request.
+"""
+import threading
+
+import psycopg2
+import psycopg2.extras
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from psycopg2 import pool as psycopg2_pool
+
+if base.is_psycopg3:
+    raise ImproperlyConfigured("The pooled PostgreSQL backend requires psycopg2.")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _pools: dict = {}
+    _pools_lock = threading.Lock()
+
+    def _get_pool(self, conn_params):
+        with self._pools_lock:
+            pool = self._pools.get(self.alias)
+            if pool is None:
+                options = self.settings_dict.get('POOL', {})
+                pool = psycopg2_pool.ThreadedConnectionPool(
+                    options.get('MIN_SIZE', 1),
+                    options.get('MAX_SIZE', 10),
+                    **conn_params,
+                )
+                self._pools[self.alias] = pool
+            return pool
+
+    def get_new_connection(self, conn_params):
+        pool = self._get_pool(conn_params)
+        connection = pool.getconn()
+        if self.settings_dict.get('CONN_HEALTH_CHECKS') and not self._pooled_connection_usable(connection):
+            # Drop connections broken by a server restart and open a fresh one.
+            pool.putconn(connection, close=True)
+            connection = pool.getconn()
+
+        options = self.settings_dict['OPTIONS']
+        if 'isolation_level' in options:
+            self.isolation_level = base.IsolationLevel(options['isolation_level'])
+            connection.isolation_level = self.isolation_level
+        else:
+            self.isolation_level = base.IsolationLevel.READ_COMMITTED
+        psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    @staticmethod
+    def _pooled_connection_usable(connection):
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self._pools[self.alias].putconn(self.connection)
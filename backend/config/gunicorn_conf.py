@@ -0,0 +1,134 @@
+"""
+Gunicorn settings, used as ``gunicorn -c config/gunicorn_conf.py config.wsgi:application``.
+
+Workers and threads are sized from the CPUs this container may use, unless
+``GUNICORN_WORKERS``/``GUNICORN_THREADS`` say otherwise. The default
+``gthread`` workers keep serving while requests wait on the database. They
+are not meant for the availability stream, which would park a thread per
+client: serve ``config.asgi:application`` with
+``GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker`` for that (the
+``events`` service in docker-compose). Workers are recycled after a jittered
+number of requests to bound memory growth. Lifecycle events go to the log
+and, when ``STATSD_HOST`` is set, to StatsD.
+
+The application is imported once in the master (``preload_app``) and the URL
+configuration is loaded before forking, so every worker starts with Django,
+DRF and all views already imported and shares those pages with the master
+copy-on-write instead of importing them again.
+"""
+import gc
+import math
+import os
+
+
+def cpu_limit() -> int:
+    """CPUs available to this process, honouring affinity and a cgroup v2 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+# gthread by default; 'uvicorn.workers.UvicornWorker' serves config.asgi:application.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('GUNICORN_WORKERS', '0')) or min(2 * cpu_limit() + 1, 12)
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+# Spread restarts out so workers do not all recycle at the same moment.
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', str(max_requests // 10)))
+
+# Heartbeat files on a RAM disk: a slow overlay filesystem can stall workers
+# long enough for the master to kill them.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+reload = os.getenv('GUNICORN_RELOAD', '0') == '1'
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1' and not reload
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+statsd_host = os.getenv('STATSD_HOST') or None
+statsd_prefix = os.getenv('STATSD_PREFIX', 'hotel_willa')
+
+
+def _metric(server, name: str) -> None:
+    # gunicorn swaps in its StatsD logger when ``statsd_host`` is set.
+    increment = getattr(server.log, 'increment', None)
+    if increment is not None:
+        increment(f'gunicorn.workers.{name}', 1)
+
+
+def _warm_up():
+    # Django resolves the URLconf lazily on the first request; do it in the
+    # master so views, serializers and their imports are shared by all workers.
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+
+
+def _check_event_backend(server):
+    from django.conf import settings
+
+    if workers > 1 and settings.AVAILABILITY_EVENTS['BACKEND'].endswith('.InMemoryEventBackend'):
+        server.log.warning(
+            "Availability events use the in-memory backend with %s workers: streams only see "
+            "bookings made in their own worker. Use bookings.events.PostgresEventBackend.",
+            workers,
+        )
+
+
+def when_ready(server):
+    server.log.info(
+        "Serving with %s %s workers x %s threads (max_requests=%s±%s)",
+        workers, worker_class, threads, max_requests, max_requests_jitter,
+    )
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    _check_event_backend(server)
+    if preload_app:
+        _warm_up()
+        # Move everything imported so far out of the collector's reach: a
+        # collection in a worker would otherwise write to (and so copy) every
+        # shared page holding an object header.
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # Never reuse a connection the master might have opened while loading.
+        from django.db import connections
+
+        connections.close_all()
+    _metric(server, 'started')
+
+
+def worker_int(worker):
+    worker.log.info("Worker %s interrupted", worker.pid)
+
+
+def worker_abort(worker):
+    worker.log.warning("Worker %s aborted after exceeding the %ss timeout", worker.pid, timeout)
+    increment = getattr(worker.log, 'increment', None)
+    if increment is not None:
+        increment('gunicorn.workers.timed_out', 1)
+
+
+def child_exit(server, worker):
+    _metric(server, 'exited')
+
+
+def worker_exit(server, worker):
+    if worker.nr >= worker.max_requests > 0:
+        server.log.info("Worker %s recycled after %s requests", worker.pid, worker.nr)
+        _metric(server, 'recycled')
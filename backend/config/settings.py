@@ -11,10 +11,12 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -55,6 +57,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'bookings.middleware.PrimaryPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,18 +86,65 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': dj_database_url.config(
-        env='DATABASE_URL',
-        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
-        conn_max_age=600,
+CONN_MAX_AGE = int(os.getenv('CONN_MAX_AGE', '600'))
+CONN_HEALTH_CHECKS = os.getenv('CONN_HEALTH_CHECKS', '1') == '1'
+# Set DATABASE_POOL_MAX_SIZE > 0 to pool PostgreSQL connections in-process
+# (config/db_backends/postgresql_pool) instead of keeping one per thread.
+DATABASE_POOL_MIN_SIZE = int(os.getenv('DATABASE_POOL_MIN_SIZE', '1'))
+DATABASE_POOL_MAX_SIZE = int(os.getenv('DATABASE_POOL_MAX_SIZE', '0'))
+
+
+def database_config(env, default=None):
+    config = dj_database_url.config(
+        env=env,
+        default=default,
+        conn_max_age=CONN_MAX_AGE,
+        conn_health_checks=CONN_HEALTH_CHECKS,
     )
+    if config and DATABASE_POOL_MAX_SIZE and config['ENGINE'] == 'django.db.backends.postgresql':
+        config.update(
+            ENGINE='config.db_backends.postgresql_pool',
+            CONN_MAX_AGE=0,
+            POOL={'MIN_SIZE': DATABASE_POOL_MIN_SIZE, 'MAX_SIZE': DATABASE_POOL_MAX_SIZE},
+        )
+    return config
+
+
+DATABASES = {
+    'default': database_config('DATABASE_URL', default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
 }
 
+# Optional read replica for read-only catalog traffic (see bookings.routers).
+if os.getenv('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = database_config('DATABASE_REPLICA_URL')
+
+DATABASE_ROUTERS = ['bookings.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
+# BoundedPBKDF2PasswordHasher takes over the pbkdf2_sha256 algorithm, so it
+# must not be listed alongside Django's PBKDF2PasswordHasher.
+PASSWORD_HASHERS = [
+    'bookings.hashers.BoundedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Password hashing runs through a bounded pool so login bursts get fast 429s
+# instead of tying up every worker. WORKERS=0 hashes inline; ITERATIONS=0
+# keeps Django's default PBKDF2 work factor.
+PASSWORD_HASHING = {
+    'WORKERS': int(os.getenv('PASSWORD_HASH_WORKERS', '0')),
+    'MAX_PENDING': int(os.getenv('PASSWORD_HASH_MAX_PENDING', '4')),
+    'WAIT_SECONDS': float(os.getenv('PASSWORD_HASH_WAIT_SECONDS', '0.5')),
+    'ITERATIONS': int(os.getenv('PASSWORD_HASH_ITERATIONS', '0')),
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -133,20 +183,55 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# collectstatic writes manifest-hashed copies plus .gz/.br siblings of text
+# assets; DEBUG keeps plain names so edits show up without collecting, and
+# test runs do too since nothing is collected before them.
+TESTING = sys.argv[1:2] == ['test']
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+            if DEBUG or TESTING
+            else 'bookings.staticfiles.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
+# /static/ and /media/ are served by the app itself (bookings.staticfiles);
+# set DJANGO_SERVE_FILES=0 when a proxy in front serves them instead.
+STATIC_SERVING = {
+    'ENABLED': os.getenv('DJANGO_SERVE_FILES', '1') == '1',
+    # Storage suffixes names already taken, so an upload rarely reuses a URL.
+    'MEDIA_MAX_AGE': int(os.getenv('MEDIA_MAX_AGE', str(7 * 24 * 3600))),
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Stateless JWT auth builds request.user from token claims instead of loading
+# the User row; set JWT_STATELESS_AUTH=0 to fall back to per-request lookups.
+# Revocation is still checked on every request, against CACHES when it is
+# shared and against the token revocation table otherwise.
+JWT_STATELESS_AUTH = os.getenv('JWT_STATELESS_AUTH', '1') == '1'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'bookings.authentication.StatelessJWTAuthentication'
+        if JWT_STATELESS_AUTH
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
     'DEFAULT_PAGINATION_CLASS': 'bookings.pagination.ArrayFriendlyPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('AUTH_IP_THROTTLE_RATE', '30/min'),
+        'login_username': os.getenv('LOGIN_USERNAME_THROTTLE_RATE', '10/min'),
+    },
 }
 
 SIMPLE_JWT = {
@@ -154,10 +239,23 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_USER_CLASS': 'bookings.authentication.HotelWillaTokenUser',
+}
+
+# A shared cache (e.g. Redis) fronts the token revocation table; with the
+# per-process default every authenticated request reads the table instead.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', ''),
+    }
 }
 
 CORS_ALLOW_ALL_ORIGINS = os.getenv('CORS_ALLOW_ALL', '1') == '1'
 CORS_ALLOW_CREDENTIALS = True
+# The read-your-writes pin (bookings.routers) is returned and echoed as a header.
+CORS_ALLOW_HEADERS = (*default_headers, 'x-primary-pin')
+CORS_EXPOSE_HEADERS = ['X-Primary-Pin']
 frontend_origins = os.getenv('CORS_ALLOWED_ORIGINS', '')
 if frontend_origins:
     CORS_ALLOWED_ORIGINS = [origin.strip() for origin in frontend_origins.split(',') if origin.strip()]
@@ -167,6 +265,54 @@ CSRF_TRUSTED_ORIGINS = [
     if origin.strip()
 ]
 
+BOOKING_EXPORT_CHUNK_SIZE = int(os.getenv('BOOKING_EXPORT_CHUNK_SIZE', '2000'))
+
+CATALOG_IMPORT_BATCH_SIZE = int(os.getenv('CATALOG_IMPORT_BATCH_SIZE', '500'))
+
+BOOKING_HOLD_MINUTES = int(os.getenv('BOOKING_HOLD_MINUTES', '15'))
+
+# Table reservations: slots of MINUTES start every STEP_MINUTES between OPENS and CLOSES (local time).
+TABLE_SLOTS = {
+    'OPENS': os.getenv('TABLE_SLOTS_OPENS', '17:00'),
+    'CLOSES': os.getenv('TABLE_SLOTS_CLOSES', '23:00'),
+    'MINUTES': int(os.getenv('TABLE_SLOT_MINUTES', '90')),
+    'STEP_MINUTES': int(os.getenv('TABLE_SLOT_STEP_MINUTES', '30')),
+}
+
+ITINERARY_MAX_ITEMS = int(os.getenv('ITINERARY_MAX_ITEMS', '10'))
+
+# Waitlisted guests may not be online when they are promoted, so their hold lasts longer.
+WAITLIST_HOLD_HOURS = int(os.getenv('WAITLIST_HOLD_HOURS', '24'))
+
+# Events must reach streams in every gunicorn worker and come from run_worker
+# and cron processes too, so PostgreSQL deployments share them via NOTIFY. The
+# in-memory backend only suits a single-process dev server.
+AVAILABILITY_EVENTS = {
+    'BACKEND': os.getenv(
+        'AVAILABILITY_EVENT_BACKEND',
+        'bookings.events.PostgresEventBackend'
+        if 'postgresql' in DATABASES['default']['ENGINE']
+        else 'bookings.events.InMemoryEventBackend',
+    ),
+    'QUEUE_SIZE': int(os.getenv('AVAILABILITY_EVENT_QUEUE_SIZE', '100')),
+    'HEARTBEAT_SECONDS': int(os.getenv('AVAILABILITY_HEARTBEAT_SECONDS', '15')),
+    # Streams end after this long and the browser's EventSource reconnects, so
+    # a stream whose client vanished unnoticed cannot linger for ever.
+    'MAX_STREAM_SECONDS': int(os.getenv('AVAILABILITY_MAX_STREAM_SECONDS', '300')),
+    # Streams served by a WSGI (threaded) worker each hold a thread; cap them
+    # per process so they cannot starve the API. ASGI streams are not capped.
+    'SYNC_STREAMS': int(os.getenv('AVAILABILITY_SYNC_STREAMS', '1')),
+}
+
+OUTBOX = {
+    'BATCH_SIZE': int(os.getenv('OUTBOX_BATCH_SIZE', '50')),
+    'WORKERS': int(os.getenv('OUTBOX_WORKERS', '4')),
+    'POLL_INTERVAL': float(os.getenv('OUTBOX_POLL_INTERVAL', '1')),
+    'LEASE_SECONDS': int(os.getenv('OUTBOX_LEASE_SECONDS', '300')),
+    'MAX_ATTEMPTS': int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5')),
+    'RETRY_BACKOFF_SECONDS': int(os.getenv('OUTBOX_RETRY_BACKOFF_SECONDS', '30')),
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 LOGGING = {
@@ -0,0 +1,21 @@
+"""
+Two independent SQLite databases for exercising the primary/replica router:
+
+    python manage.py test bookings.tests.ReplicaRoutingTests --settings=config.settings_test
+
+The replica is not replicated from the primary, so only tests written for
+that split belong under these settings.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test-primary.sqlite3',
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test-replica.sqlite3',
+    },
+}
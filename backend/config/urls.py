@@ -14,18 +14,26 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+from django.views.decorators.cache import cache_control
 from django.views.generic import TemplateView
 
+from bookings.staticfiles import serve_media, serve_static
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('bookings.urls')),
-    # Serve the built frontend index.html at the site root (development only)
-    path('', TemplateView.as_view(template_name='frontend/index.html')),
+    # The built frontend's index.html. It links the current hashed bundle, so
+    # browsers revalidate it on every visit and fetch assets only when they change.
+    path('', cache_control(no_cache=True)(TemplateView.as_view(template_name='frontend/index.html'))),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.STATIC_SERVING['ENABLED']:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_static),
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media),
+    ]
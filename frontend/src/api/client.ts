@@ -6,16 +6,30 @@ const api = axios.create({
   baseURL: API_BASE_URL,
 })
 
+// After a write the API returns a short-lived signed pin; echoing it keeps this
+// client's reads on the primary database until the write has replicated.
+const PRIMARY_PIN_HEADER = 'x-primary-pin'
+let primaryPin: string | null = null
+
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('hotel_willa_token')
   if (token) {
     config.headers.Authorization = `Bearer ${token}`
   }
+  if (primaryPin) {
+    config.headers[PRIMARY_PIN_HEADER] = primaryPin
+  }
   return config
 })
 
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const pin = response.headers[PRIMARY_PIN_HEADER]
+    if (typeof pin === 'string' && pin) {
+      primaryPin = pin
+    }
+    return response
+  },
   async (error) => {
     if (error.response?.status === 401) {
       localStorage.removeItem('hotel_willa_token')